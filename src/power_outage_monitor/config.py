@@ -1,28 +1,185 @@
 """Configuration management for Power Outage Monitor."""
 
-import argparse
-import json
+import atexit
+import io
 import os
+import queue
 import sys
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Tuple
 import logging
+import logging.handlers
 
-# Fix Windows console for Ukrainian text
-if sys.platform.startswith("win"):
-    try:
-        os.system("chcp 65001 >nul 2>&1")
-        if hasattr(sys.stdout, "reconfigure"):
-            sys.stdout.reconfigure(encoding="utf-8", errors="replace")
-            sys.stderr.reconfigure(encoding="utf-8", errors="replace")
-    except Exception:
-        pass
+from .utils import load_json
+
+if TYPE_CHECKING:
+    import argparse
+
+_UTF8_ENCODINGS = ("utf-8", "utf8", "cp65001")
+
+
+def _is_utf8(stream) -> bool:
+    return (getattr(stream, "encoding", None) or "").lower() in _UTF8_ENCODINGS
+
+
+def _ensure_utf8(stream) -> None:
+    """Switch a console stream to UTF-8 unless it already uses it."""
+    if stream is not None and not _is_utf8(stream) and hasattr(stream, "reconfigure"):
+        stream.reconfigure(encoding="utf-8", errors="replace")
+
+
+# Fix Windows console for Ukrainian text, unless it already speaks UTF-8
+if sys.platform.startswith("win") and not os.environ.get("PYTHONIOENCODING"):
+    if not _is_utf8(sys.stdout):
+        try:
+            os.system("chcp 65001 >nul 2>&1")
+        except Exception:
+            pass
+    for _stream in (sys.stdout, sys.stderr):
+        try:
+            _ensure_utf8(_stream)
+        except Exception:
+            pass
+
+
+# Seconds between background flushes of buffered log output
+LOG_FLUSH_INTERVAL = 30.0
+
+# Background thread that writes queued log records to the real handlers
+_log_listener: Optional[logging.handlers.QueueListener] = None
+# Background thread that periodically flushes those handlers
+_log_flusher: Optional["PeriodicFlusher"] = None
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """File handler that lets a 64 KiB buffer batch log writes.
+
+    Records are encoded to UTF-8 once and appended to a binary buffered
+    file opened with O_APPEND. Records at ERROR and above are flushed at
+    once; everything else waits for the buffer to fill or for a
+    ``PeriodicFlusher`` to flush it.
+    """
+
+    _OPEN_FLAGS = (
+        os.O_WRONLY
+        | os.O_APPEND
+        | os.O_CREAT
+        | getattr(os, "O_CLOEXEC", 0)
+        | getattr(os, "O_BINARY", 0)
+    )
+
+    def __init__(self, filename: Path):
+        # Open lazily so runs that never log leave no empty file behind
+        super().__init__(os.fspath(filename), encoding="utf-8", delay=True)
+
+    def _open(self):
+        fd = os.open(self.baseFilename, self._OPEN_FLAGS, 0o644)
+        return io.BufferedWriter(io.FileIO(fd, "a", closefd=True), 65536)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            msg = self.format(record) + self.terminator
+            self.stream.write(msg.encode("utf-8", "replace"))
+            if record.levelno >= logging.ERROR:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class FastFormatter(logging.Formatter):
+    """Formatter producing the standard layouts with f-strings.
+
+    The date part of ``asctime`` is computed once per second instead of
+    calling ``time.strftime`` for every record.
+    """
+
+    SIMPLE_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+    DEBUG_FORMAT = (
+        "%(asctime)s - %(filename)s:%(lineno)d - %(funcName)s() - "
+        "%(levelname)s - %(message)s"
+    )
+
+    def __init__(self, debug: bool = False):
+        super().__init__(self.DEBUG_FORMAT if debug else self.SIMPLE_FORMAT)
+        self.debug = debug
+        # (second, formatted date) kept in one tuple: the console handler
+        # and the queue listener thread share this formatter, and a single
+        # assignment keeps the pair consistent between them
+        self._cache: Tuple[Optional[int], str] = (None, "")
 
+    def formatTime(self, record: logging.LogRecord, datefmt=None) -> str:
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        sec = int(record.created)
+        cached_sec, text = self._cache
+        if sec != cached_sec:
+            text = time.strftime("%Y-%m-%d %H:%M:%S", self.converter(record.created))
+            self._cache = (sec, text)
+        return f"{text},{int(record.msecs):03d}"
 
-@dataclass
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        if self.debug:
+            return (
+                f"{record.asctime} - {record.filename}:{record.lineno} - "
+                f"{record.funcName}() - {record.levelname} - {record.message}"
+            )
+        return f"{record.asctime} - {record.levelname} - {record.message}"
+
+
+class PeriodicFlusher(threading.Thread):
+    """Daemon thread flushing handlers every ``interval`` seconds.
+
+    Bounds how stale the log file can get during quiet periods between
+    monitoring cycles.
+    """
+
+    def __init__(self, handlers: List[logging.Handler], interval: float):
+        super().__init__(name="log-flusher", daemon=True)
+        self.handlers = handlers
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            for handler in self.handlers:
+                handler.flush()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+def stop_logging() -> None:
+    """Drain queued log records, stop the background log threads and close files."""
+    global _log_listener, _log_flusher
+    if _log_flusher is not None:
+        _log_flusher.stop()
+        _log_flusher = None
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.flush()
+            handler.close()
+        _log_listener = None
+
+
+atexit.register(stop_logging)
+
+
+@dataclass(frozen=True)
 class Config:
-    """Configuration settings for the power outage monitor."""
+    """Configuration settings for the power outage monitor.
+
+    Frozen so a parsed configuration can be shared and used as a cache key.
+    """
 
     # Paths
     db_path: Path = Path("power_outages.db")
@@ -39,12 +196,13 @@ class Config:
     continuous_mode: bool = False
 
     # Filtering
-    group_filter: Optional[List[str]] = None
+    group_filter: Optional[FrozenSet[str]] = None
     groups_file: str = "groups.json"
 
     # Logging
     log_level: str = "INFO"
     log_file: Optional[Path] = Path("power_monitor.log")
+    log_level_num: int = field(init=False, repr=False, compare=False)
 
     # ICS settings
     ics_timezone: str = "Europe/Kiev"
@@ -53,33 +211,60 @@ class Config:
     # Data cleanup
     cleanup_days: int = 30
 
+    def __post_init__(self):
+        # Resolve the numeric level once; unknown names fall back to INFO
+        level = logging.getLevelName(self.log_level.upper())
+        if not isinstance(level, int):
+            level = logging.INFO
+        object.__setattr__(self, "log_level_num", level)
+
+
+# Parsed group files keyed by path: (st_mtime_ns, st_size, group codes)
+_group_cache: Dict[str, Tuple[int, int, Optional[FrozenSet[str]]]] = {}
+
 
 def parse_group_input(
     console_input: Optional[str], json_file: str
-) -> Optional[List[str]]:
+) -> Optional[FrozenSet[str]]:
     """Parse group input with priority: console input > json file > None"""
     group_codes = None
 
     if console_input:
-        group_codes = [g.strip() for g in console_input.split(",") if g.strip()]
-    elif json_file and os.path.exists(json_file):
+        group_codes = frozenset(
+            g.strip() for g in console_input.split(",") if g.strip()
+        )
+    elif json_file:
         try:
-            with open(json_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if (
-                    isinstance(data, dict) and "group" in data and isinstance(data["group"], list)
-                ):
-                    group_codes = [
-                        str(g).strip() for g in data["group"] if str(g).strip()
-                    ]
+            st = os.stat(json_file)
+        except OSError:
+            return None
+
+        cached = _group_cache.get(json_file)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+
+        try:
+            data = load_json(json_file)
+            if (
+                isinstance(data, dict) and "group" in data and isinstance(data["group"], list)
+            ):
+                group_codes = frozenset(
+                    str(g).strip() for g in data["group"] if str(g).strip()
+                )
+            _group_cache[json_file] = (st.st_mtime_ns, st.st_size, group_codes)
         except Exception as e:
-            print(f"[ERROR] Could not read group codes from {json_file}: {e}")
+            logging.getLogger(__name__).warning(
+                "Could not read group codes from %s: %s", json_file, e
+            )
 
     return group_codes
 
 
-def parse_arguments() -> Config:
-    """Parse command line arguments and return configuration."""
+@lru_cache(maxsize=None)
+def _build_parser() -> "argparse.ArgumentParser":
+    """Build the command line parser once per process."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Power Outage Monitor with group filtering"
     )
@@ -137,8 +322,12 @@ def parse_arguments() -> Config:
     parser.add_argument(
         "--cleanup-days", type=int, default=30, help="Days to keep in database cleanup"
     )
+    return parser
+
 
-    args = parser.parse_args()
+def parse_arguments(argv: Optional[List[str]] = None) -> Config:
+    """Parse command line arguments (sys.argv by default) and return configuration."""
+    args = _build_parser().parse_args(argv)
 
     # Parse group filter
     group_filter = parse_group_input(args.groups, args.groups_file)
@@ -159,30 +348,40 @@ def parse_arguments() -> Config:
 
 
 def setup_logging(config: Config) -> logging.Logger:
-    """Setup logging configuration with enhanced file information only in DEBUG mode."""
-    import sys
-    import logging
+    """Setup logging configuration with enhanced file information only in DEBUG mode.
+
+    File records go through a queue to a background listener thread, so disk
+    writes stay off the monitoring loop. The console handler stays on the
+    logger so log lines keep their order relative to print() output.
+    """
+    global _log_listener, _log_flusher
+
+    stop_logging()
 
     logger = logging.getLogger(__name__)
-    logger.setLevel(getattr(logging, config.log_level))
+    logger.setLevel(config.log_level_num)
+    for handler in logger.handlers:
+        handler.close()
     logger.handlers.clear()
 
-    # Define formatters
-    debug_formatter = logging.Formatter(
-        "%(asctime)s - %(filename)s:%(lineno)d - %(funcName)s() - %(levelname)s - %(message)s"
-    )
-    simple_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-
-    # Choose formatter based on log level
-    formatter = (
-        debug_formatter if config.log_level.upper() == "DEBUG" else simple_formatter
-    )
+    # File details in the layout only in DEBUG mode
+    formatter = FastFormatter(debug=config.log_level_num == logging.DEBUG)
 
     # File handler
     if config.log_file:
-        file_handler = logging.FileHandler(config.log_file, encoding="utf-8")
+        log_path = Path(config.log_file).resolve()
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = BufferedFileHandler(log_path)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+
+        log_queue = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        _log_listener = logging.handlers.QueueListener(
+            log_queue, file_handler, respect_handler_level=True
+        )
+        _log_listener.start()
+        _log_flusher = PeriodicFlusher([file_handler], LOG_FLUSH_INTERVAL)
+        _log_flusher.start()
 
     # Console handler with error handling for encoding issues
     try:
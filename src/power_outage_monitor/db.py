@@ -1,14 +1,94 @@
 """Database operations for Power Outage Monitor with enhanced event tracking."""
 
+import atexit
 import sqlite3
+import time
 import uuid
 import hashlib
-from datetime import datetime
+import weakref
+from datetime import datetime, time as dt_time, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 import logging
 from dataclasses import dataclass
-import pytz
+
+from .utils import load_timezone, localize, time_to_minutes
+
+# Stored in metadata; bump whenever _verify_and_upgrade_schema gains a step
+SCHEMA_VERSION = "4.1"
+
+# Per-connection tuning; journal_mode=WAL is persistent and set once on init.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA temp_store=MEMORY",
+    # Reads go through the OS page cache, which survives across polls
+    "PRAGMA mmap_size=268435456",
+)
+
+_INSERT_PERIOD_SQL = """
+    INSERT INTO periods (
+        recid, insert_ts, date, last_update, name, status,
+        period_from, period_to, calendar_event_id, calendar_event_uid,
+        calendar_event_state, calendar_event_ts, event_sent, event_hash,
+        created_at, updated_at, period_from_min, period_to_min
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Serves get_events_for_generation: state/sent filters plus the group code
+# filter, which must use the exact same substr(name, 7) expression. Also
+# serves lookups and GROUP BY on calendar_event_state alone.
+_STATE_GROUP_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_periods_state_sent_group "
+    "ON periods(calendar_event_state, event_sent, substr(name, 7))"
+)
+
+
+# Serves the insert_ts range delete in cleanup_old_data
+_INSERT_TS_INDEX_SQL = (
+    "CREATE INDEX IF NOT EXISTS idx_periods_insert_ts ON periods(insert_ts)"
+)
+
+
+@lru_cache(maxsize=None)
+def _events_for_generation_sql(group_count: int) -> str:
+    """Build the get_events_for_generation query for a number of group codes.
+
+    The IN list stays inline so the substr(name, 7) index column can be used;
+    caching keeps the SQL text identical between calls, which is what
+    sqlite3's statement cache keys on.
+    """
+    group_clause = ""
+    if group_count:
+        placeholders = ",".join("?" * group_count)
+        group_clause = f"AND substr(name, 7) IN ({placeholders})"
+    return f"""
+        SELECT * FROM periods
+        WHERE ((calendar_event_state = 'generated' AND event_sent = 0
+                AND date >= ?)
+            OR (calendar_event_state = 'cancelled' AND event_sent = 1))
+        {group_clause}
+        ORDER BY name, date, period_from, period_to, last_update DESC, insert_ts DESC
+    """
+
+
+@lru_cache(maxsize=4096)
+def _event_hash(
+    date: str,
+    name: str,
+    status: str,
+    period_from: Optional[str],
+    period_to: Optional[str],
+) -> str:
+    """Hash identifying an event for duplicate detection.
+
+    Stays MD5 so hashes match the ones already stored in existing databases.
+    The same periods are re-scraped every cycle, hence the cache.
+    """
+    hash_string = f"{date}|{name}|{status}|{period_from or ''}|{period_to or ''}"
+    return hashlib.md5(hash_string.encode()).hexdigest()
 
 
 @dataclass
@@ -52,8 +132,23 @@ class OutagePeriod:
 
     def _generate_event_hash(self) -> str:
         """Generate hash for duplicate detection."""
-        hash_string = f"{self.date}|{self.name}|{self.status}|{self.period_from or ''}|{self.period_to or ''}"
-        return hashlib.md5(hash_string.encode()).hexdigest()
+        return _event_hash(
+            self.date, self.name, self.status, self.period_from, self.period_to
+        )
+
+
+# Databases with cached connections, closed at exit; weak references so the
+# exit hook does not keep discarded instances and their connections alive
+_open_databases: "weakref.WeakSet[PowerOutageDatabase]" = weakref.WeakSet()
+
+
+def _close_open_databases() -> None:
+    """Close the cached connections of every live database at exit."""
+    for database in list(_open_databases):
+        database.close()
+
+
+atexit.register(_close_open_databases)
 
 
 class PowerOutageDatabase:
@@ -62,7 +157,12 @@ class PowerOutageDatabase:
     def __init__(self, db_path: Path, logger: logging.Logger):
         self.db_path = db_path
         self.logger = logger
-        self.ukraine_tz = pytz.timezone("Europe/Kiev")
+        self.ukraine_tz = load_timezone("Europe/Kiev")
+        self._date_str = ""
+        self._date_str_expires = 0.0
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self._write_conn: Optional[sqlite3.Connection] = None
+        _open_databases.add(self)
         self._init_database()
 
     def _init_database(self) -> None:
@@ -74,10 +174,53 @@ class PowerOutageDatabase:
         else:
             self.logger.info(f"[OK] Creating new database: {self.db_path}")
             self._create_fresh_database()
+        self._enable_wal_mode()
+
+    def _connect(self, readonly: bool = False) -> sqlite3.Connection:
+        """Open a connection to the database with tuned PRAGMAs applied.
+
+        The write connection uses IMMEDIATE isolation so every implicit
+        transaction takes the RESERVED lock up front instead of upgrading
+        from a read lock (which can fail with SQLITE_BUSY).
+        """
+        if readonly:
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+        else:
+            conn = sqlite3.connect(self.db_path, isolation_level="IMMEDIATE")
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _write_connection(self) -> sqlite3.Connection:
+        """Return the cached write connection, opening it on first use."""
+        if self._write_conn is None:
+            self._write_conn = self._connect()
+        return self._write_conn
+
+    def _read_connection(self) -> sqlite3.Connection:
+        """Return the cached read-only connection, opening it on first use."""
+        if self._read_conn is None:
+            self._read_conn = self._connect(readonly=True)
+        return self._read_conn
+
+    def close(self) -> None:
+        """Close cached database connections."""
+        for conn in (self._read_conn, self._write_conn):
+            if conn is not None:
+                conn.close()
+        self._read_conn = None
+        self._write_conn = None
+
+    def _enable_wal_mode(self) -> None:
+        """Switch the database file to WAL journaling (persists in the file)."""
+        with self._write_connection() as conn:
+            mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+            self.logger.debug("SQLite journal mode: %s", mode)
 
     def _create_fresh_database(self) -> None:
         """Create database with enhanced schema for event tracking."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write_connection() as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute("""
@@ -97,7 +240,9 @@ class PowerOutageDatabase:
                         event_sent BOOLEAN DEFAULT 0,
                         event_hash TEXT,
                         created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                        updated_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                        period_from_min INTEGER,
+                        period_to_min INTEGER
                     )
                 """)
 
@@ -105,13 +250,14 @@ class PowerOutageDatabase:
                 indexes = [
                     "CREATE INDEX IF NOT EXISTS idx_periods_date ON periods(date)",
                     "CREATE INDEX IF NOT EXISTS idx_periods_name ON periods(name)",
-                    "CREATE INDEX IF NOT EXISTS idx_periods_state ON periods(calendar_event_state)",
                     "CREATE INDEX IF NOT EXISTS idx_periods_last_update ON periods(last_update)",
-                    "CREATE INDEX IF NOT EXISTS idx_periods_date_name ON periods(date, name)",
+                    "CREATE INDEX IF NOT EXISTS idx_periods_date_name_lu_ts ON periods(date, name, last_update DESC, insert_ts DESC)",
                     "CREATE INDEX IF NOT EXISTS idx_periods_uid ON periods(calendar_event_uid)",
                     "CREATE INDEX IF NOT EXISTS idx_periods_hash ON periods(event_hash)",
                     "CREATE INDEX IF NOT EXISTS idx_periods_sent ON periods(event_sent)",
                     "CREATE INDEX IF NOT EXISTS idx_periods_unique_event ON periods(event_hash, calendar_event_state)",
+                    _STATE_GROUP_INDEX_SQL,
+                    _INSERT_TS_INDEX_SQL,
                 ]
 
                 for idx_sql in indexes:
@@ -126,7 +272,8 @@ class PowerOutageDatabase:
                 """)
 
                 cursor.execute(
-                    "INSERT INTO metadata (key, value) VALUES ('schema_version', '4.0')"
+                    "INSERT INTO metadata (key, value) VALUES ('schema_version', ?)",
+                    (SCHEMA_VERSION,),
                 )
                 cursor.execute(
                     "INSERT INTO metadata (key, value) VALUES ('created_at', ?)",
@@ -145,9 +292,22 @@ class PowerOutageDatabase:
 
     def _verify_and_upgrade_schema(self) -> None:
         """Verify and upgrade existing schema for event tracking."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write_connection() as conn:
             cursor = conn.cursor()
             try:
+                # Nothing to do if the database is already at this version
+                try:
+                    cursor.execute(
+                        "SELECT value FROM metadata WHERE key = 'schema_version'"
+                    )
+                    version = cursor.fetchone()
+                except sqlite3.OperationalError:
+                    # No metadata table yet
+                    version = None
+                if version and version[0] == SCHEMA_VERSION:
+                    self.logger.debug("Database schema is current (%s)", SCHEMA_VERSION)
+                    return
+
                 # Check if periods table exists
                 cursor.execute(
                     "SELECT name FROM sqlite_master WHERE type='table' AND name='periods'"
@@ -170,13 +330,6 @@ class PowerOutageDatabase:
                             updated_at TEXT DEFAULT CURRENT_TIMESTAMP
                         )
                     """)
-                    cursor.execute(
-                        "INSERT INTO metadata (key, value) VALUES ('schema_version', '4.0')"
-                    )
-                    cursor.execute(
-                        "INSERT INTO metadata (key, value) VALUES ('upgraded_at', ?)",
-                        (datetime.now().isoformat(),),
-                    )
 
                 # Check existing columns
                 cursor.execute("PRAGMA table_info(periods)")
@@ -189,6 +342,8 @@ class PowerOutageDatabase:
                     "calendar_event_uid": "TEXT",
                     "created_at": "TEXT DEFAULT CURRENT_TIMESTAMP",
                     "updated_at": "TEXT DEFAULT CURRENT_TIMESTAMP",
+                    "period_from_min": "INTEGER",
+                    "period_to_min": "INTEGER",
                 }
 
                 for col_name, col_def in new_columns.items():
@@ -204,36 +359,70 @@ class PowerOutageDatabase:
                 )
                 records_without_uid = cursor.fetchall()
 
+                updates = []
                 for record in records_without_uid:
                     recid, date, name, status, period_from, period_to = record
                     new_uid = f"{uuid.uuid4()}@power-monitor"
+                    event_hash = _event_hash(date, name, status, period_from, period_to)
+                    updates.append((new_uid, event_hash, recid))
 
-                    # Generate hash
-                    hash_string = (
-                        f"{date}|{name}|{status}|{period_from or ''}|{period_to or ''}"
-                    )
-                    event_hash = hashlib.md5(hash_string.encode()).hexdigest()
-
-                    cursor.execute(
-                        "UPDATE periods SET calendar_event_uid = ?, event_hash = ? WHERE recid = ?",
-                        (new_uid, event_hash, recid),
-                    )
+                # One prepared UPDATE for all rows, committed with the migration
+                cursor.executemany(
+                    "UPDATE periods SET calendar_event_uid = ?, event_hash = ? WHERE recid = ?",
+                    updates,
+                )
 
                 if records_without_uid:
                     self.logger.info(
                         f"Generated UIDs and hashes for {len(records_without_uid)} existing records"
                     )
 
+                # Fill in minute spans for timed records written before they
+                # were stored
+                cursor.execute(
+                    "SELECT recid, period_from, period_to FROM periods WHERE period_from_min IS NULL AND period_from <> '' AND period_to <> ''"
+                )
+                span_updates = [
+                    (*self._times_span(period_from, period_to), recid)
+                    for recid, period_from, period_to in cursor.fetchall()
+                ]
+                cursor.executemany(
+                    "UPDATE periods SET period_from_min = ?, period_to_min = ? WHERE recid = ?",
+                    span_updates,
+                )
+                if span_updates:
+                    self.logger.info(
+                        f"Stored minute spans for {len(span_updates)} existing records"
+                    )
+
                 # Create new indexes
                 new_indexes = [
                     "CREATE INDEX IF NOT EXISTS idx_periods_hash ON periods(event_hash)",
                     "CREATE INDEX IF NOT EXISTS idx_periods_sent ON periods(event_sent)",
                     "CREATE INDEX IF NOT EXISTS idx_periods_uid ON periods(calendar_event_uid)",
+                    "CREATE INDEX IF NOT EXISTS idx_periods_date_name_lu_ts ON periods(date, name, last_update DESC, insert_ts DESC)",
+                    _STATE_GROUP_INDEX_SQL,
+                    _INSERT_TS_INDEX_SQL,
+                    # Superseded by idx_periods_date_name_lu_ts (same leading columns)
+                    "DROP INDEX IF EXISTS idx_periods_date_name",
+                    # Superseded by idx_periods_state_sent_group (same leading column)
+                    "DROP INDEX IF EXISTS idx_periods_state",
                 ]
 
                 for idx_sql in new_indexes:
                     cursor.execute(idx_sql)
 
+                cursor.executemany(
+                    """
+                    INSERT OR REPLACE INTO metadata (key, value, updated_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                """,
+                    [
+                        ("schema_version", SCHEMA_VERSION),
+                        ("upgraded_at", datetime.now().isoformat()),
+                    ],
+                )
+
                 conn.commit()
                 self.logger.info("[OK] Database schema upgraded for event tracking")
 
@@ -248,67 +437,95 @@ class PowerOutageDatabase:
         return current_datetime_ukraine.date()
 
     def get_ukraine_current_date_str(self) -> str:
-        """Get current date in Ukraine timezone as string"""
-        return self.get_ukraine_current_date().strftime("%d.%m.%Y")
+        """Get current date in Ukraine timezone as string.
+
+        The string is cached until the next Ukrainian midnight.
+        """
+        if time.time() >= self._date_str_expires:
+            now = datetime.now(self.ukraine_tz)
+            next_midnight = localize(
+                datetime.combine(now.date() + timedelta(days=1), dt_time()),
+                self.ukraine_tz,
+            )
+            self._date_str = now.strftime("%d.%m.%Y")
+            self._date_str_expires = next_midnight.timestamp()
+        return self._date_str
+
+    @staticmethod
+    def _period_to_row(period: OutagePeriod) -> Tuple:
+        """Convert OutagePeriod object to an INSERT parameter tuple."""
+        span = PowerOutageDatabase._period_span(period) or (None, None)
+        return (
+            period.recid,
+            period.insert_ts,
+            period.date,
+            period.last_update,
+            period.name,
+            period.status,
+            period.period_from,
+            period.period_to,
+            period.calendar_event_id,
+            period.calendar_event_uid,
+            period.calendar_event_state,
+            period.calendar_event_ts,
+            period.event_sent,
+            period.event_hash,
+            period.created_at,
+            period.updated_at,
+            *span,
+        )
 
     def insert_period(self, period: OutagePeriod) -> str:
         """Insert a new outage period and return its recid."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        self.insert_periods((period,))
+        return period.recid
 
-            cursor.execute(
-                """
-                INSERT INTO periods (
-                    recid, insert_ts, date, last_update, name, status,
-                    period_from, period_to, calendar_event_id, calendar_event_uid,
-                    calendar_event_state, calendar_event_ts, event_sent, event_hash,
-                    created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-                (
-                    period.recid,
-                    period.insert_ts,
-                    period.date,
-                    period.last_update,
-                    period.name,
-                    period.status,
-                    period.period_from,
-                    period.period_to,
-                    period.calendar_event_id,
-                    period.calendar_event_uid,
-                    period.calendar_event_state,
-                    period.calendar_event_ts,
-                    period.event_sent,
-                    period.event_hash,
-                    period.created_at,
-                    period.updated_at,
-                ),
-            )
+    def insert_periods(self, periods: Iterable[OutagePeriod]) -> int:
+        """Insert outage periods in a single transaction and return the count.
+
+        ``periods`` may be any iterable, including a generator; rows are
+        streamed into executemany without building an intermediate list.
+        """
+        with self._write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(_INSERT_PERIOD_SQL, map(self._period_to_row, periods))
+            inserted = max(cursor.rowcount, 0)
 
             conn.commit()
-            self.logger.debug(f"Inserted period {period.recid} for {period.name}")
-            return period.recid
+            self.logger.debug("Inserted %d periods", inserted)
+            return inserted
 
     def update_calendar_event_state(self, recid: str, state: str) -> None:
         """Update the calendar event state of a period."""
-        with sqlite3.connect(self.db_path) as conn:
+        self.update_calendar_event_states([(recid, state)])
+
+    def update_calendar_event_states(self, updates: List[Tuple[str, str]]) -> None:
+        """Update calendar event states for (recid, state) pairs in one transaction."""
+        if not updates:
+            return
+
+        calendar_event_ts = datetime.now().isoformat()
+        with self._write_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
+            cursor.executemany(
                 """
                 UPDATE periods
                 SET calendar_event_state = ?, calendar_event_ts = ?, updated_at = CURRENT_TIMESTAMP
                 WHERE recid = ?
             """,
-                (state, datetime.now().isoformat(), recid),
+                [(state, calendar_event_ts, recid) for recid, state in updates],
             )
             conn.commit()
-            self.logger.debug(f"Updated period {recid} state to {state}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for recid, state in updates:
+                    self.logger.debug("Updated period %s state to %s", recid, state)
 
     def get_periods_by_name_and_date(self, name: str, date: str) -> List[OutagePeriod]:
         """Get all periods for a specific name and date, ordered by last_update DESC, insert_ts DESC."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(
                 """
                 SELECT * FROM periods
                 WHERE name = ? AND date >= ?
@@ -324,13 +541,30 @@ class PowerOutageDatabase:
 
             return periods
 
+    def get_periods_by_date(self, date: str) -> List[OutagePeriod]:
+        """Get all periods for a date, ordered by name, last_update DESC, insert_ts DESC."""
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(
+                """
+                SELECT * FROM periods
+                WHERE date >= ?
+                ORDER BY name, last_update DESC, insert_ts DESC
+            """,
+                (date,),
+            )
+
+            return [self._row_to_period(row) for row in cursor.fetchall()]
+
     def check_identical_event_exists(
         self, period: OutagePeriod
     ) -> Optional[OutagePeriod]:
         """Check if an identical event already exists and was sent."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(
                 """
                 SELECT * FROM periods
                 WHERE event_hash = ? AND calendar_event_state = 'generated' AND event_sent = 1
@@ -344,201 +578,263 @@ class PowerOutageDatabase:
             if row:
                 existing_period = self._row_to_period(row)
                 self.logger.debug(
-                    f"Found identical event already sent: {existing_period.calendar_event_id}"
+                    "Found identical event already sent: %s",
+                    existing_period.calendar_event_id,
                 )
                 return existing_period
 
             return None
 
-    def find_overlapping_events(self, new_period: OutagePeriod) -> List[OutagePeriod]:
-        """Find events that overlap with the new period."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+    def get_generated_events(
+        self, keys: Iterable[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], List[OutagePeriod]]:
+        """Get generated events for several (name, date) pairs in one query.
+
+        Events are grouped by (name, date) and ordered by insert_ts DESC, the
+        same order find_overlapping_events returns them in.
+        """
+        keys = set(keys)
+        generated: Dict[Tuple[str, str], List[OutagePeriod]] = {}
+        if not keys:
+            return generated
+
+        names = sorted({name for name, _ in keys})
+        dates = sorted({date for _, date in keys})
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            # name IN / date IN is a superset of the pairs; the rest is
+            # dropped below
+            cursor.execute(
+                f"""
+                SELECT * FROM periods
+                WHERE calendar_event_state = 'generated'
+                AND name IN ({",".join("?" * len(names))})
+                AND date IN ({",".join("?" * len(dates))})
+                ORDER BY insert_ts DESC
+            """,
+                names + dates,
+            )
+
+            for row in cursor.fetchall():
+                key = (row["name"], row["date"])
+                if key in keys:
+                    generated.setdefault(key, []).append(self._row_to_period(row))
+
+        return generated
+
+    def find_overlapping_events(
+        self,
+        new_period: OutagePeriod,
+        candidates: Optional[List[OutagePeriod]] = None,
+    ) -> List[OutagePeriod]:
+        """Find events that overlap with the new period.
+
+        If ``candidates`` (generated events for the period's name and date,
+        e.g. from get_generated_events) is given, they are filtered in memory
+        instead of querying the database.
+        """
+        if candidates is not None:
+            overlapping = [
+                existing
+                for existing in candidates
+                if existing.recid != new_period.recid
+                and self._periods_overlap(new_period, existing)
+            ]
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for existing_period in overlapping:
+                    self.logger.debug(
+                        "Found overlapping event: %s", existing_period.calendar_event_id
+                    )
+            return overlapping
+
+        with self._read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
 
-            # Get all generated events for the same group and date
-            cursor = conn.execute(
+            # Generated events for the same group and date that overlap the
+            # new period, using the stored minute spans (same rules as
+            # _spans_overlap) so only matching rows are returned
+            new_start, new_end = self._period_span(new_period) or (None, None)
+            cursor.execute(
                 """
                 SELECT * FROM periods
                 WHERE name = ? AND date = ? AND calendar_event_state = 'generated'
                 AND recid != ?
+                AND CASE WHEN period_from_min IS NULL OR ? IS NULL
+                         THEN status = ?
+                         ELSE period_to_min > ? AND ? > period_from_min
+                    END
                 ORDER BY insert_ts DESC
             """,
-                (new_period.name, new_period.date, new_period.recid or ""),
+                (
+                    new_period.name,
+                    new_period.date,
+                    new_period.recid or "",
+                    new_start,
+                    new_period.status,
+                    new_start,
+                    new_end,
+                ),
             )
 
             overlapping = []
-
             for row in cursor.fetchall():
                 existing_period = self._row_to_period(row)
-
-                # Check for overlap
-                if self._periods_overlap(new_period, existing_period):
-                    overlapping.append(existing_period)
-                    self.logger.debug(
-                        f"Found overlapping event: {existing_period.calendar_event_id}"
-                    )
+                overlapping.append(existing_period)
+                self.logger.debug(
+                    "Found overlapping event: %s", existing_period.calendar_event_id
+                )
 
             return overlapping
 
     def _periods_overlap(self, period1: OutagePeriod, period2: OutagePeriod) -> bool:
         """Check if two periods overlap (any intersection)."""
+        return self._spans_overlap(
+            self._period_span(period1),
+            period1.status,
+            self._period_span(period2),
+            period2.status,
+        )
+
+    @staticmethod
+    def _spans_overlap(
+        span1: Optional[Tuple[int, int]],
+        status1: str,
+        span2: Optional[Tuple[int, int]],
+        status2: str,
+    ) -> bool:
+        """Check if two (start, end) minute spans overlap."""
         # If either period has no time range, consider them overlapping if same status
-        if not (
-            period1.period_from and period1.period_to and period2.period_from and period2.period_to
-        ):
-            return period1.status == period2.status
+        if span1 is None or span2 is None:
+            return status1 == status2
+
+        return span1[1] > span2[0] and span2[1] > span1[0]
+
+    @staticmethod
+    def _period_span(period: OutagePeriod) -> Optional[Tuple[int, int]]:
+        """Return (start, end) minutes of a timed period, None if it has no times."""
+        return PowerOutageDatabase._times_span(period.period_from, period.period_to)
+
+    @staticmethod
+    def _times_span(
+        period_from: Optional[str], period_to: Optional[str]
+    ) -> Optional[Tuple[int, int]]:
+        """Return (start, end) minutes for HH:MM bounds, None if either is empty."""
+        if not (period_from and period_to):
+            return None
 
-        try:
-            start1 = self._time_to_minutes(period1.period_from)
-            end1 = self._time_to_minutes(period1.period_to)
-            start2 = self._time_to_minutes(period2.period_from)
-            end2 = self._time_to_minutes(period2.period_to)
-
-            # Handle overnight periods
-            if end1 <= start1:
-                end1 += 24 * 60
-            if end2 <= start2:
-                end2 += 24 * 60
-
-            return not (end1 <= start2 or end2 <= start1)
-        except Exception as e:
-            self.logger.warning(f"Error checking overlap: {e}")
-            return False
+        start = time_to_minutes(period_from)
+        end = time_to_minutes(period_to)
 
-    def _time_to_minutes(self, time_str: str) -> int:
-        """Convert time string to minutes since midnight."""
-        if not time_str:
-            return 0
-        try:
-            hours, minutes = map(int, time_str.split(":"))
-            return hours * 60 + minutes
-        except (ValueError, AttributeError):
-            return 0
+        # Handle overnight periods
+        if end <= start:
+            end += 24 * 60
+
+        return start, end
 
     def mark_events_for_cancellation(self, periods: List[OutagePeriod]) -> None:
         """Mark events for cancellation (to be cancelled in next ICS generation)."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
-            for period in periods:
-                cursor.execute(
-                    """
-                    UPDATE periods
-                    SET calendar_event_state = 'cancelled',
-                        calendar_event_ts = ?,
-                        updated_at = CURRENT_TIMESTAMP
-                    WHERE recid = ?
-                """,
-                    (datetime.now().isoformat(), period.recid),
-                )
+        if not periods:
+            return
 
-                self.logger.info(
-                    f"Marked event {period.calendar_event_id} for cancellation due to overlap"
-                )
+        cancelled_ts = datetime.now().isoformat()
+        # One transaction (IMMEDIATE on the write connection) for the batch
+        with self._write_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany(
+                """
+                UPDATE periods
+                SET calendar_event_state = 'cancelled',
+                    calendar_event_ts = ?,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE recid = ?
+            """,
+                [(cancelled_ts, period.recid) for period in periods],
+            )
 
-            conn.commit()
+        self.logger.info(
+            f"Marked {len(periods)} event(s) for cancellation due to overlap: "
+            + ", ".join(str(period.calendar_event_id) for period in periods)
+        )
 
     def mark_event_as_sent(self, recid: str) -> None:
         """Mark an event as sent (ICS file generated)."""
-        with sqlite3.connect(self.db_path) as conn:
+        self.mark_events_as_sent([recid])
+
+    def mark_events_as_sent(self, recids: List[str]) -> None:
+        """Mark several events as sent in one transaction."""
+        if not recids:
+            return
+
+        with self._write_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
+            cursor.executemany(
                 """
                 UPDATE periods
                 SET event_sent = 1, updated_at = CURRENT_TIMESTAMP
                 WHERE recid = ?
             """,
-                (recid,),
+                [(recid,) for recid in recids],
             )
             conn.commit()
-            self.logger.debug(f"Marked event {recid} as sent")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for recid in recids:
+                    self.logger.debug("Marked event %s as sent", recid)
 
     def get_events_for_generation(
-        self, group_filter: Optional[List[str]] = None
+        self, group_filter: Optional[Iterable[str]] = None
     ) -> Dict[str, List[OutagePeriod]]:
         """Get events that need to be generated or cancelled."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
 
                 try:
                     current_date_ukraine = self.get_ukraine_current_date_str()
                     self.logger.debug(
-                        f"Current Ukraine date for event generation: {current_date_ukraine}"
+                        "Current Ukraine date for event generation: %s",
+                        current_date_ukraine,
                     )
                 except Exception as e:
                     self.logger.error(f"Error getting Ukraine current date: {e}")
                     raise
 
-                # Get events to generate (generated but not sent)
+                # Get events to generate (generated but not sent) and events
+                # to cancel (cancelled but not yet processed) in one query
                 try:
-                    if group_filter:
-                        placeholders = ",".join("?" for _ in group_filter)
-                        cursor = conn.execute(
-                            f"""
-                            SELECT * FROM periods
-                            WHERE date >= ? AND calendar_event_state = 'generated'
-                            AND event_sent = 0 AND substr(name, 7) IN ({placeholders})
-                            ORDER BY name, date, period_from, period_to, last_update DESC, insert_ts DESC
-                        """,
-                            (current_date_ukraine,) + tuple(group_filter),
-                        )
-                    else:
-                        cursor = conn.execute(
-                            """
-                            SELECT * FROM periods
-                            WHERE date >= ? AND calendar_event_state = 'generated' AND event_sent = 0
-                            ORDER BY name, date, period_from, period_to, last_update DESC, insert_ts DESC
-                        """,
-                            (current_date_ukraine,),
-                        )
+                    groups = tuple(group_filter or ())
+                    query = _events_for_generation_sql(len(groups))
+                    params = (current_date_ukraine,) + groups
+                    cursor.execute(query, params)
                 except Exception as e:
-                    self.logger.error(f"Error fetching events to create: {e}")
+                    self.logger.error(f"Error fetching events for generation: {e}")
                     raise
 
                 events_to_create = []
+                events_to_cancel = []
                 seen_hashes = set()
                 try:
                     for row in cursor.fetchall():
-                        # Deduplicate by hash
-                        if row["event_hash"] not in seen_hashes:
-                            seen_hashes.add(row["event_hash"])
-                            period = self._row_to_period(row)
-                            events_to_create.append(period)
-                except Exception as e:
-                    self.logger.error(f"Error processing events to create: {e}")
-                    raise
-
-                # Get events to cancel (cancelled but not yet processed)
-                try:
-                    if group_filter:
-                        cursor = conn.execute(
-                            f"""
-                            SELECT * FROM periods
-                            WHERE calendar_event_state = 'cancelled' AND event_sent = 1
-                            AND substr(name, 7) IN ({placeholders})
-                            ORDER BY calendar_event_ts DESC
-                        """,
-                            tuple(group_filter),
-                        )
-                    else:
-                        cursor = conn.execute("""
-                            SELECT * FROM periods
-                            WHERE calendar_event_state = 'cancelled' AND event_sent = 1
-                            ORDER BY calendar_event_ts DESC
-                        """)
+                        if row["calendar_event_state"] == "cancelled":
+                            events_to_cancel.append(self._row_to_period(row))
+                        else:
+                            # Deduplicate by hash; rows without one (should not
+                            # survive the schema upgrade) fall back to the event
+                            # id instead of all collapsing onto None
+                            key = row["event_hash"] or row["calendar_event_id"]
+                            if key not in seen_hashes:
+                                seen_hashes.add(key)
+                                events_to_create.append(self._row_to_period(row))
                 except Exception as e:
-                    self.logger.error(f"Error fetching events to cancel: {e}")
+                    self.logger.error(f"Error processing events for generation: {e}")
                     raise
 
-                events_to_cancel = []
-                try:
-                    for row in cursor.fetchall():
-                        period = self._row_to_period(row)
-                        events_to_cancel.append(period)
-                except Exception as e:
-                    self.logger.error(f"Error processing events to cancel: {e}")
-                    raise
+                # Cancellations are reported newest first
+                events_to_cancel.sort(
+                    key=lambda p: p.calendar_event_ts or "", reverse=True
+                )
 
                 self.logger.info(
                     f"Events for generation: {len(events_to_create)} to create, {len(events_to_cancel)} to cancel"
@@ -554,7 +850,7 @@ class PowerOutageDatabase:
 
     def get_comprehensive_stats(self) -> Dict[str, Any]:
         """Get comprehensive database statistics with safe error handling"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             stats = {
                 "total_records": 0,
@@ -571,78 +867,60 @@ class PowerOutageDatabase:
             }
 
             try:
-                # Total records
-                cursor.execute("SELECT COUNT(*) FROM periods")
-                total_count = cursor.fetchone()
-                if total_count and total_count[0] > 0:
-                    stats["total_records"] = total_count[0]
-
-                    # Unique dates
-                    cursor.execute("SELECT COUNT(DISTINCT date) FROM periods")
-                    unique_dates = cursor.fetchone()
-                    stats["unique_dates"] = unique_dates[0] if unique_dates else 0
-
-                    # Unique groups
-                    cursor.execute("SELECT COUNT(DISTINCT name) FROM periods")
-                    unique_groups = cursor.fetchone()
-                    stats["unique_groups"] = unique_groups[0] if unique_groups else 0
-
-                    # By calendar state
-                    cursor.execute("""
-                        SELECT calendar_event_state, COUNT(*)
-                        FROM periods
-                        GROUP BY calendar_event_state
-                    """)
-                    stats["by_state"] = dict(cursor.fetchall())
-
-                    # Date range
-                    cursor.execute(
-                        "SELECT MIN(date), MAX(date) FROM periods WHERE date IS NOT NULL AND date != ''"
-                    )
-                    date_range = cursor.fetchone()
-                    if date_range and date_range[0]:
-                        stats["date_range"] = {
-                            "from": date_range[0],
-                            "to": date_range[1],
-                        }
-
-                    # Last 24h records
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM periods
-                        WHERE datetime(insert_ts) > datetime('now', '-24 hours')
-                    """)
-                    recent = cursor.fetchone()
-                    stats["last_24h_records"] = recent[0] if recent else 0
-
-                    # By status
-                    cursor.execute("""
-                        SELECT status, COUNT(*)
-                        FROM periods
-                        GROUP BY status
-                    """)
-                    stats["by_status"] = dict(cursor.fetchall())
-
-                    # Latest info
-                    cursor.execute("""
-                        SELECT MAX(last_update), MAX(insert_ts)
-                        FROM periods
-                    """)
-                    latest_info = cursor.fetchone()
-                    if latest_info:
-                        stats["latest_update"] = latest_info[0]
-                        stats["latest_insert"] = latest_info[1]
-
-                    # Event tracking stats
-
-                    cursor.execute("SELECT COUNT(*) FROM periods WHERE event_sent = 1")
-                    sent_count = cursor.fetchone()
-                    stats["events_sent"] = sent_count[0] if sent_count else 0
+                # Scalar aggregates in a single table scan
+                cursor.execute("""
+                    SELECT
+                        COUNT(*),
+                        COUNT(DISTINCT date),
+                        COUNT(DISTINCT name),
+                        MIN(NULLIF(date, '')),
+                        MAX(NULLIF(date, '')),
+                        MAX(last_update),
+                        MAX(insert_ts),
+                        SUM(datetime(insert_ts) > datetime('now', '-24 hours')),
+                        SUM(event_sent = 1),
+                        SUM(calendar_event_state = 'generated' AND event_sent = 0)
+                    FROM periods
+                """)
+                (
+                    total_records,
+                    unique_dates,
+                    unique_groups,
+                    date_from,
+                    date_to,
+                    latest_update,
+                    latest_insert,
+                    last_24h_records,
+                    events_sent,
+                    events_pending,
+                ) = cursor.fetchone()
+
+                stats["total_records"] = total_records
+                stats["unique_dates"] = unique_dates
+                stats["unique_groups"] = unique_groups
+                if date_from:
+                    stats["date_range"] = {"from": date_from, "to": date_to}
+                stats["last_24h_records"] = last_24h_records or 0
+                stats["latest_update"] = latest_update
+                stats["latest_insert"] = latest_insert
+                stats["events_sent"] = events_sent or 0
+                stats["events_pending"] = events_pending or 0
+
+                # By calendar state
+                cursor.execute("""
+                    SELECT calendar_event_state, COUNT(*)
+                    FROM periods
+                    GROUP BY calendar_event_state
+                """)
+                stats["by_state"] = dict(cursor.fetchall())
 
-                    cursor.execute(
-                        "SELECT COUNT(*) FROM periods WHERE calendar_event_state = 'generated' AND event_sent = 0"
-                    )
-                    pending_count = cursor.fetchone()
-                    stats["events_pending"] = pending_count[0] if pending_count else 0
+                # By status
+                cursor.execute("""
+                    SELECT status, COUNT(*)
+                    FROM periods
+                    GROUP BY status
+                """)
+                stats["by_status"] = dict(cursor.fetchall())
 
             except Exception as e:
                 self.logger.error(f"Error getting stats: {e}")
@@ -651,13 +929,13 @@ class PowerOutageDatabase:
 
     def cleanup_old_data(self, days_to_keep: int = 30) -> int:
         """Clean up old data while preserving recent records"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._write_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute("""
-                    DELETE FROM periods
-                    WHERE datetime(insert_ts) < datetime('now', '-{} days')
-                """.format(days_to_keep))
+                # insert_ts is a local isoformat() string, so a cutoff in the
+                # same format compares correctly and can use the index
+                cutoff = (datetime.now() - timedelta(days=days_to_keep)).isoformat()
+                cursor.execute("DELETE FROM periods WHERE insert_ts < ?", (cutoff,))
                 deleted_count = cursor.rowcount
                 conn.commit()
                 self.logger.info(
@@ -666,11 +944,13 @@ class PowerOutageDatabase:
                 return deleted_count
             except Exception as e:
                 self.logger.error(f"Error cleaning up data: {e}")
+                if conn.in_transaction:
+                    conn.rollback()
                 return 0
 
     def query_periods_by_date(self, date: str) -> List[Tuple]:
         """Query periods by specific date"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 """
@@ -688,16 +968,19 @@ class PowerOutageDatabase:
         """Export all periods to CSV file."""
         import csv
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._read_connection() as conn:
             cursor = conn.cursor()
+            cursor.arraysize = 1000
             cursor.execute("""
                 SELECT date, name, status, period_from, period_to,
                        calendar_event_state, last_update, insert_ts, event_sent
                 FROM periods
                 ORDER BY date DESC, name
             """)
-            results = cursor.fetchall()
 
+            # Rows are streamed in arraysize batches instead of fetched all at
+            # once; writerows() loops over each batch in C
+            record_count = 0
             with open(output_path, "w", newline="", encoding="utf-8") as csvfile:
                 writer = csv.writer(csvfile)
                 writer.writerow(
@@ -713,14 +996,22 @@ class PowerOutageDatabase:
                         "Event Sent",
                     ]
                 )
-                writer.writerows(results)
+                rows = cursor.fetchmany()
+                while rows:
+                    writer.writerows(rows)
+                    record_count += len(rows)
+                    rows = cursor.fetchmany()
 
         self.logger.info(
-            f"[OK] Data exported to {output_path} ({len(results)} records)"
+            f"[OK] Data exported to {output_path} ({record_count} records)"
         )
 
     def _row_to_period(self, row) -> OutagePeriod:
-        """Convert database row to OutagePeriod object."""
+        """Convert database row to OutagePeriod object.
+
+        Callers select * from periods, and _init_database has added every
+        tracking column by then, so all columns can be read directly.
+        """
         return OutagePeriod(
             recid=row["recid"],
             insert_ts=row["insert_ts"],
@@ -734,8 +1025,8 @@ class PowerOutageDatabase:
             calendar_event_uid=row["calendar_event_uid"],
             calendar_event_state=row["calendar_event_state"],
             calendar_event_ts=row["calendar_event_ts"],
-            event_sent=bool(row["event_sent"]) if "event_sent" in row.keys() else False,
-            event_hash=row["event_hash"] if "event_hash" in row.keys() else None,
-            created_at=row["created_at"] if "created_at" in row.keys() else None,
-            updated_at=row["updated_at"] if "updated_at" in row.keys() else None,
+            event_sent=bool(row["event_sent"]),
+            event_hash=row["event_hash"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
         )
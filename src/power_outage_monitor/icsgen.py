@@ -3,11 +3,91 @@ Power Outage Monitor."""
 
 import re
 import uuid
-from datetime import datetime, timedelta
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone, tzinfo
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
-import pytz
+
+from .utils import load_timezone, localize
+
+# str.translate maps each special character to its escaped form in one pass
+_ICS_ESCAPE = str.maketrans({"\\": "\\\\", ",": "\\,", ";": "\\;", "\n": "\\n"})
+
+# Namespace for UIDs derived from calendar_event_id when an event has none
+_UID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "power-outage-monitor")
+
+# Above this many events only the combined file is written; it carries the
+# same events and avoids one file create per event
+MAX_SINGLE_ICS_FILES = 50
+
+# Characters not allowed in Windows filenames, replaced with "_"; a compiled
+# regex beats str.translate on the mostly Cyrillic event ids
+_UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+_CALENDAR_HEADER = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//Power Monitor//Power Outage Monitor//EN\r\n"
+    "CALSCALE:GREGORIAN\r\n"
+    "METHOD:{method}\r\n"
+)
+_PUBLISH_HEADER = _CALENDAR_HEADER.format(method="PUBLISH")
+_CANCEL_HEADER = _CALENDAR_HEADER.format(method="CANCEL")
+
+_CALENDAR_FOOTER = "END:VCALENDAR"
+
+_EVENT_TEMPLATE = (
+    "BEGIN:VEVENT\r\n"
+    "UID:{uid}\r\n"
+    "DTSTAMP:{dtstamp}\r\n"
+    "CREATED:{dtstamp}\r\n"
+    "{dtstart}\r\n"
+    "{dtend}\r\n"
+    "SUMMARY:{summary}\r\n"
+    "DESCRIPTION:{description}\r\n"
+    "CATEGORIES:{categories}\r\n"
+    "STATUS:CONFIRMED\r\n"
+    "TRANSP:OPAQUE\r\n"
+    "END:VEVENT\r\n"
+)
+
+_CANCEL_EVENT_TEMPLATE = (
+    "BEGIN:VEVENT\r\n"
+    "UID:{uid}\r\n"
+    "DTSTAMP:{dtstamp}\r\n"
+    "SUMMARY:{summary}\r\n"
+    "STATUS:CANCELLED\r\n"
+    "END:VEVENT\r\n"
+)
+
+
+@lru_cache(maxsize=4096)
+def _parse_local_datetime(date_str: str, time_str: str, tz: tzinfo) -> datetime:
+    """Parse "DD.MM.YYYY HH:MM" and attach ``tz``; schedules repeat these a lot."""
+    hour, minute = time_str.split(":")
+    naive_dt = _parse_date(date_str).replace(hour=int(hour), minute=int(minute))
+    return localize(naive_dt, tz)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str: str) -> datetime:
+    """Parse a "DD.MM.YYYY" date string."""
+    # The format is fixed, so split it directly; strptime is several times slower
+    day, month, year = date_str.split(".")
+    return datetime(int(year), int(month), int(day))
+
+
+def _format_ics_date(dt: datetime) -> str:
+    """Format a date as ICS "YYYYMMDD"."""
+    return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}"
+
+
+@lru_cache(maxsize=4096)
+def _all_day_bounds(date_str: str) -> Tuple[str, str]:
+    """Return the ICS start and exclusive end dates for an all-day event."""
+    start = _parse_date(date_str)
+    return _format_ics_date(start), _format_ics_date(start + timedelta(days=1))
 
 
 class ICSEventGenerator:
@@ -24,15 +104,13 @@ class ICSEventGenerator:
         self.timezone = timezone
         self.calendar_name = calendar_name
         self.logger = logger
-        self.ukraine_tz = pytz.timezone(timezone)
+        self.ukraine_tz = load_timezone(timezone)
         self.output_dir.mkdir(exist_ok=True)
 
     def parse_ukraine_datetime(self, date_str: str, time_str: str) -> datetime:
         """Parse Ukraine datetime from date and time strings"""
         try:
-            naive_dt = datetime.strptime(f"{date_str} {time_str}", "%d.%m.%Y %H:%M")
-            ukraine_dt = self.ukraine_tz.localize(naive_dt)
-            return ukraine_dt
+            return _parse_local_datetime(date_str, time_str, self.ukraine_tz)
         except ValueError as e:
             self.logger.warning(
                 f"Error parsing Ukraine datetime '{date_str} {time_str}': {e}"
@@ -42,29 +120,43 @@ class ICSEventGenerator:
     def parse_date_to_datetime(self, date_str: str) -> datetime:
         """Parse date string to datetime"""
         try:
-            return datetime.strptime(date_str, "%d.%m.%Y")
+            return _parse_date(date_str)
         except ValueError:
             return datetime.now()
 
     def format_datetime_for_ics(self, dt: datetime) -> str:
         """Format datetime for ICS file"""
         if dt.tzinfo is not None:
-            utc_dt = dt.astimezone(pytz.UTC)
-        else:
-            utc_dt = dt
-        return utc_dt.strftime("%Y%m%dT%H%M%SZ")
-
-    def escape_text(self, text: str) -> str:
-        """Escape text for ICS format"""
+            dt = dt.astimezone(timezone.utc)
+        # Formatted directly; strftime parses its format string on every call
         return (
-            text.replace("\\", "\\\\")
-            .replace(",", "\\,")
-            .replace(";", "\\;")
-            .replace("\n", "\\n")
+            f"{dt.year:04d}{dt.month:02d}{dt.day:02d}"
+            f"T{dt.hour:02d}{dt.minute:02d}{dt.second:02d}Z"
         )
 
-    def create_ics_content(self, event: Dict[str, Any]) -> str:
+    def escape_text(self, text: str) -> str:
+        """Escape text for ICS format"""
+        # translate() is slow on non-ASCII text; most values need no escaping
+        if "\\" in text or "," in text or ";" in text or "\n" in text:
+            return text.translate(_ICS_ESCAPE)
+        return text
+
+    def create_ics_content(
+        self, event: Dict[str, Any], dtstamp: Optional[str] = None
+    ) -> str:
         """Create ICS content for a single event"""
+        return _PUBLISH_HEADER + self.format_event(event, dtstamp) + _CALENDAR_FOOTER
+
+    def format_event(
+        self, event: Dict[str, Any], dtstamp: Optional[str] = None
+    ) -> str:
+        """Render the VEVENT block for a single event
+
+        Pass a preformatted ``dtstamp`` to share one timestamp across a batch.
+        """
+        if dtstamp is None:
+            dtstamp = self.format_datetime_for_ics(datetime.now(timezone.utc))
+
         # Determine event timing
         if event.get("period_from") and event.get("period_to"):
             start_time_ukraine = self.parse_ukraine_datetime(
@@ -81,20 +173,17 @@ class ICSEventGenerator:
             dtstart = f"DTSTART:{self.format_datetime_for_ics(start_time_ukraine)}"
             dtend = f"DTEND:{self.format_datetime_for_ics(end_time_ukraine)}"
         else:
-            # All-day event
-            event_date = self.parse_date_to_datetime(event["date"])
-            dtstart = f"DTSTART;VALUE=DATE:{event_date.strftime('%Y%m%d')}"
-            dtend = f"DTEND;VALUE=DATE:{(event_date + timedelta(days=1)).strftime('%Y%m%d')}"
-
-        # Event metadata
-        uid = event.get("calendar_event_uid", f"{uuid.uuid4()}@power-monitor")
-        now_utc = datetime.now(pytz.UTC)
-        dtstamp = f"DTSTAMP:{self.format_datetime_for_ics(now_utc)}"
-        created = f"CREATED:{self.format_datetime_for_ics(now_utc)}"
+            # All-day event; events in a batch share a handful of dates
+            try:
+                start_date, end_date = _all_day_bounds(event["date"])
+            except ValueError:
+                event_date = self.parse_date_to_datetime(event["date"])
+                start_date = _format_ics_date(event_date)
+                end_date = _format_ics_date(event_date + timedelta(days=1))
+            dtstart = f"DTSTART;VALUE=DATE:{start_date}"
+            dtend = f"DTEND;VALUE=DATE:{end_date}"
 
         # Event content
-        summary = self.escape_text(event["calendar_event_id"])
-
         description_parts = [
             f"Дата: {event['date']}",
             f"Група: {event['name']}",
@@ -107,50 +196,46 @@ class ICSEventGenerator:
                 f"Період: {event['period_from']} - {event['period_to']} (час України)"
             )
 
-        description = self.escape_text(" | ".join(description_parts))
-
         # Categories based on status
         if event["status"] == "Електроенергії немає":
             categories = "POWER OUTAGE,UTILITY"
         else:
             categories = "POWER AVAILABLE,UTILITY"
 
-        # Build ICS content
-        ics_content = [
-            "BEGIN:VCALENDAR",
-            "VERSION:2.0",
-            "PRODID:-//Power Monitor//Power Outage Monitor//EN",
-            "CALSCALE:GREGORIAN",
-            "METHOD:PUBLISH",
-            "BEGIN:VEVENT",
-            f"UID:{uid}",
-            dtstamp,
-            created,
-            dtstart,
-            dtend,
-            f"SUMMARY:{summary}",
-            f"DESCRIPTION:{description}",
-            f"CATEGORIES:{categories}",
-            "STATUS:CONFIRMED",
-            "TRANSP:OPAQUE",
-            "END:VEVENT",
-            "END:VCALENDAR",
-        ]
-
-        return "\r\n".join(ics_content)
+        # A UID derived from the event id stays the same across re-imports
+        uid = event.get("calendar_event_uid")
+        if not uid:
+            event_uuid = uuid.uuid5(_UID_NAMESPACE, event["calendar_event_id"])
+            uid = f"{event_uuid}@power-monitor"
+
+        return _EVENT_TEMPLATE.format(
+            uid=uid,
+            dtstamp=dtstamp,
+            dtstart=dtstart,
+            dtend=dtend,
+            summary=self.escape_text(event["calendar_event_id"]),
+            description=self.escape_text(" | ".join(description_parts)),
+            categories=categories,
+        )
 
-    def create_single_ics_file(self, event: Dict[str, Any]) -> Optional[Path]:
+    def create_single_ics_file(
+        self,
+        event: Dict[str, Any],
+        timestamp: Optional[str] = None,
+        dtstamp: Optional[str] = None,
+    ) -> Optional[Path]:
         """Create individual ICS file for a single event"""
         try:
             # Create safe filename
-            safe_title = re.sub(r'[<>:"/\\|?*]', "_", event["calendar_event_id"])
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            safe_title = _UNSAFE_FILENAME_CHARS.sub("_", event["calendar_event_id"])
+            if timestamp is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{timestamp}_{safe_title}.ics"
             filepath = self.output_dir / filename
 
-            ics_content = self.create_ics_content(event)
+            ics_content = self.create_ics_content(event, dtstamp)
 
-            with open(filepath, "w", encoding="utf-8") as f:
+            with open(filepath, "w", encoding="utf-8", newline="") as f:
                 f.write(ics_content)
 
             return filepath
@@ -162,91 +247,29 @@ class ICSEventGenerator:
             return None
 
     def create_combined_ics_file(
-        self, events_to_create: List[Dict[str, Any]]
+        self,
+        events_to_create: List[Dict[str, Any]],
+        timestamp: Optional[str] = None,
+        dtstamp: Optional[str] = None,
     ) -> Optional[Path]:
         """Create combined ICS file for all events"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            if timestamp is None:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{timestamp}_all_power_events.ics"
             filepath = self.output_dir / filename
 
-            ics_lines = [
-                "BEGIN:VCALENDAR",
-                "VERSION:2.0",
-                "PRODID:-//Power Monitor//Power Outage Monitor//EN",
-                "CALSCALE:GREGORIAN",
-                "METHOD:PUBLISH",
-            ]
-
-            for event in events_to_create:
-                # Determine event timing
-                if event.get("period_from") and event.get("period_to"):
-                    start_time_ukraine = self.parse_ukraine_datetime(
-                        event["date"], event["period_from"]
-                    )
-                    end_time_ukraine = self.parse_ukraine_datetime(
-                        event["date"], event["period_to"]
-                    )
-
-                    if end_time_ukraine <= start_time_ukraine:
-                        end_time_ukraine += timedelta(days=1)
-
-                    dtstart = (
-                        f"DTSTART:{self.format_datetime_for_ics(start_time_ukraine)}"
-                    )
-                    dtend = f"DTEND:{self.format_datetime_for_ics(end_time_ukraine)}"
-                else:
-                    event_date = self.parse_date_to_datetime(event["date"])
-                    dtstart = f"DTSTART;VALUE=DATE:{event_date.strftime('%Y%m%d')}"
-                    dtend = f"DTEND;VALUE=DATE:{(event_date + timedelta(days=1)).strftime('%Y%m%d')}"
-
-                uid = event.get("calendar_event_uid", f"{uuid.uuid4()}@power-monitor")
-                now_utc = datetime.now(pytz.UTC)
-                dtstamp = f"DTSTAMP:{self.format_datetime_for_ics(now_utc)}"
-                created = f"CREATED:{self.format_datetime_for_ics(now_utc)}"
-
-                summary = self.escape_text(event["calendar_event_id"])
-
-                description_parts = [
-                    f"Дата: {event['date']}",
-                    f"Група: {event['name']}",
-                    f"Статус: {event['status']}",
-                    f"Останнє оновлення: {event['last_update']}",
-                ]
-
-                if event.get("period_from") and event.get("period_to"):
-                    description_parts.append(
-                        f"Період: {event['period_from']} - {event['period_to']} (час України)"
-                    )
-
-                description = self.escape_text(" | ".join(description_parts))
-
-                if event["status"] == "Електроенергії немає":
-                    categories = "POWER OUTAGE,UTILITY"
-                else:
-                    categories = "POWER AVAILABLE,UTILITY"
-
-                event_lines = [
-                    "BEGIN:VEVENT",
-                    f"UID:{uid}",
-                    dtstamp,
-                    created,
-                    dtstart,
-                    dtend,
-                    f"SUMMARY:{summary}",
-                    f"DESCRIPTION:{description}",
-                    f"CATEGORIES:{categories}",
-                    "STATUS:CONFIRMED",
-                    "TRANSP:OPAQUE",
-                    "END:VEVENT",
-                ]
-
-                ics_lines.extend(event_lines)
-
-            ics_lines.append("END:VCALENDAR")
+            # Stream events to the file instead of joining them in memory;
+            # newline="" keeps the CRLF line endings ICS requires
+            if dtstamp is None:
+                dtstamp = self.format_datetime_for_ics(datetime.now(timezone.utc))
 
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write("\r\n".join(ics_lines))
+            with open(filepath, "w", encoding="utf-8", newline="") as f:
+                write = f.write
+                write(_PUBLISH_HEADER)
+                for event in events_to_create:
+                    write(self.format_event(event, dtstamp))
+                write(_CALENDAR_FOOTER)
 
             self.logger.info(
                 f"[OK] Combined ICS file created: {filename} ({len(events_to_create)} events)"
@@ -269,35 +292,21 @@ class ICSEventGenerator:
         filepath = self.output_dir / filename
 
         try:
-            ics_lines = [
-                "BEGIN:VCALENDAR",
-                "VERSION:2.0",
-                "PRODID:-//Power Monitor//Power Outage Monitor//EN",
-                "CALSCALE:GREGORIAN",
-                "METHOD:CANCEL",
-            ]
-
-            for event in events_to_delete:
-                uid = event.get(
-                    "calendar_event_uid", f"{event['calendar_event_id']}@power-monitor"
-                )
-                now_utc = datetime.now(pytz.UTC)
-                dtstamp = f"DTSTAMP:{self.format_datetime_for_ics(now_utc)}"
-
-                event_lines = [
-                    "BEGIN:VEVENT",
-                    f"UID:{uid}",
-                    dtstamp,
-                    f"SUMMARY:{event['calendar_event_id']}",
-                    "STATUS:CANCELLED",
-                    "END:VEVENT",
-                ]
-                ics_lines.extend(event_lines)
-
-            ics_lines.append("END:VCALENDAR")
-
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write("\r\n".join(ics_lines))
+            dtstamp = self.format_datetime_for_ics(datetime.now(timezone.utc))
+
+            with open(filepath, "w", encoding="utf-8", newline="") as f:
+                write = f.write
+                write(_CANCEL_HEADER)
+                for event in events_to_delete:
+                    event_id = event["calendar_event_id"]
+                    # Only build the fallback UID when the event has none
+                    uid = event.get("calendar_event_uid") or event_id + "@power-monitor"
+                    write(
+                        _CANCEL_EVENT_TEMPLATE.format(
+                            uid=uid, dtstamp=dtstamp, summary=event_id
+                        )
+                    )
+                write(_CALENDAR_FOOTER)
 
             self.logger.info(
                 f"[OK] Cancellation ICS file created: {filename} ({len(events_to_delete)} events)"
@@ -349,18 +358,32 @@ class ICSEventGenerator:
             return
 
         created_files = []
+        single_count = 0
+
+        # One filename timestamp and DTSTAMP for every file in the batch
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        dtstamp = self.format_datetime_for_ics(datetime.now(timezone.utc))
 
         # Create individual files
-        for event in events_to_create:
-            filepath = self.create_single_ics_file(event)
-            if filepath:
-                created_files.append(filepath)
+        if len(events_to_create) <= MAX_SINGLE_ICS_FILES:
+            for event in events_to_create:
+                filepath = self.create_single_ics_file(event, timestamp, dtstamp)
+                if filepath:
+                    created_files.append(filepath)
+                    single_count += 1
+        else:
+            self.logger.info(
+                f"{len(events_to_create)} events exceed {MAX_SINGLE_ICS_FILES}, "
+                "writing the combined file only"
+            )
 
         # Create combined file
-        combined_filepath = self.create_combined_ics_file(events_to_create)
+        combined_filepath = self.create_combined_ics_file(
+            events_to_create, timestamp, dtstamp
+        )
         if combined_filepath:
             created_files.append(combined_filepath)
 
         self.logger.info(f"[OK] Created {len(created_files)} ICS files")
-        self.logger.info(f"  Individual files: {len(events_to_create)}")
+        self.logger.info(f"  Individual files: {single_count}")
         self.logger.info("  Combined file: 1")
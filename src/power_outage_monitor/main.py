@@ -2,8 +2,28 @@
 
 import sys
 from .config import parse_arguments, setup_logging
+from .icsgen import MAX_SINGLE_ICS_FILES
 from .monitor import PowerOutageMonitor
 
+# Console banners are prebuilt so each one is printed with a single call
+_RULE = "-" * 80
+_TITLE_BANNER = "\n".join(
+    [
+        "=" * 80,
+        "POWER OUTAGE MONITOR - ICS CALENDAR SUPPORT WITH UKRAINE TIMEZONE",
+        "=" * 80,
+        "\n1. STARTUP & DATABASE CHECK",
+        _RULE,
+    ]
+)
+_INIT_BANNER = f"{_RULE}\n\n2. INITIALIZING MONITOR\n{_RULE}"
+_CYCLE_BANNER = f"{_RULE}\n\n3. RUNNING SINGLE MONITORING CYCLE\n{_RULE}"
+_RESULTS_BANNER = f"\n4. PROCESS RESULTS\n{_RULE}"
+_CONTINUOUS_BANNER = f"{_RULE}\n\n5. CONTINUOUS MONITORING OPTIONS\n{_RULE}"
+_FILTERS_BANNER = f"{_RULE}\n\n6. RUNNING WITH GROUP FILTERS\n{_RULE}"
+_CLEANUP_BANNER = f"{_RULE}\n\n7. CLEANUP OLD RECORDS\n{_RULE}"
+_EXIT_BANNER = f"{_RULE}\nExit."
+
 
 def main():
     """Main entry point with comprehensive output and Ukrainian support."""
@@ -14,11 +34,7 @@ def main():
         # Setup logging
         logger = setup_logging(config)
 
-        print("=" * 80)
-        print("POWER OUTAGE MONITOR - ICS CALENDAR SUPPORT WITH UKRAINE TIMEZONE")
-        print("=" * 80)
-        print("\n1. STARTUP & DATABASE CHECK")
-        print("-" * 80)
+        print(_TITLE_BANNER)
         logger.info("The script will check if the database exists.")
         logger.info(
             "If it exists, it will be used and upgraded if needed (no data loss)."
@@ -27,17 +43,12 @@ def main():
         logger.info(
             "Group filter will be determined from console or JSON file (if provided)."
         )
-        print("-" * 80)
-
-        print("\n2. INITIALIZING MONITOR")
-        print("-" * 80)
+        print(_INIT_BANNER)
 
         # Create monitor
         monitor = PowerOutageMonitor(config, logger)
 
-        print("-" * 80)
-        print("\n3. RUNNING SINGLE MONITORING CYCLE")
-        print("-" * 80)
+        print(_CYCLE_BANNER)
 
         # Run based on configuration
         if config.continuous_mode:
@@ -46,8 +57,7 @@ def main():
             success, status = monitor.run_full_process()
 
             if success:
-                print("\n4. PROCESS RESULTS")
-                print("-" * 80)
+                print(_RESULTS_BANNER)
 
                 if status == "success":
                     logger.info("[OK] Process completed successfully!")
@@ -66,30 +76,17 @@ def main():
 
                     if today_data:
                         logger.info(f"\nToday's periods ({today}):")
-                        seen = set()
-                        for record in today_data:
-                            (
-                                name,
-                                status_text,
-                                period_from,
-                                period_to,
-                                state,
-                                last_update,
-                                event_id,
-                            ) = record
-
-                            # Create unique key to avoid duplicates
-                            unique_key = (
-                                name,
-                                status_text,
-                                period_from,
-                                period_to,
-                                state,
-                            )
-                            if unique_key in seen:
-                                continue
-                            seen.add(unique_key)
-
+                        # Deduplicate on the displayed fields, keeping first-seen order
+                        unique_periods = dict.fromkeys(
+                            record[:5] for record in today_data
+                        )
+                        for (
+                            name,
+                            status_text,
+                            period_from,
+                            period_to,
+                            state,
+                        ) in unique_periods:
                             time_info = (
                                 f"({period_from}-{period_to})"
                                 if period_from and period_to
@@ -118,7 +115,9 @@ def main():
                     # Usage instructions
                     logger.info("\nICS Files Usage:")
                     logger.info(
-                        "  - Individual .ics files: Import each file separately"
+                        "  - Individual .ics files: Import each file separately "
+                        f"(written only for runs of up to {MAX_SINGLE_ICS_FILES} "
+                        "events)"
                     )
                     logger.info("  - Combined .ics file: Import all events at once")
                     logger.info(
@@ -136,9 +135,7 @@ def main():
                 logger.info("\n[ERROR] Process failed - check the logs above")
 
             # Show usage information
-            print("-" * 80)
-            print("\n5. CONTINUOUS MONITORING OPTIONS")
-            print("-" * 80)
+            print(_CONTINUOUS_BANNER)
             logger.info("To run continuous monitoring, use one of these commands:")
             logger.info(
                 "  python main.py --continuous --interval 300   # Every 5 minutes"
@@ -148,9 +145,7 @@ def main():
             )
             logger.info("  python main.py --continuous --interval 3600  # Every hour")
 
-            print("-" * 80)
-            print("\n6. RUNNING WITH GROUP FILTERS")
-            print("-" * 80)
+            print(_FILTERS_BANNER)
             logger.info("You can filter monitoring by specific group codes using:")
             logger.info("  --groups 1.1,2.1,3.2")
             logger.info("or by providing a JSON file (default: groups.json) with:")
@@ -172,15 +167,12 @@ def main():
             )
             logger.info("=" * 80)
 
-        print("-" * 80)
-        print("\n7. CLEANUP OLD RECORDS")
-        print("-" * 80)
+        print(_CLEANUP_BANNER)
         monitor.cleanup_old_data()
         logger.info(
             f"Old records cleanup completed (older than {config.cleanup_days} days)"
         )
-        print("-" * 80)
-        print("Exit.")
+        print(_EXIT_BANNER)
 
     except KeyboardInterrupt:
         logger.info("\nOperation cancelled by user")
@@ -1,7 +1,6 @@
 """Main orchestrator for Power Outage Monitor with enhanced event tracking."""
 
 import time
-import json
 from pathlib import Path
 from typing import List, Dict, Any, Tuple, Optional
 import logging
@@ -11,7 +10,7 @@ from .config import Config
 from .db import PowerOutageDatabase
 from .scraper import PowerOutageScraper
 from .icsgen import ICSEventGenerator
-from .utils import GroupFilter, SmartPeriodComparator
+from .utils import GroupFilter, SmartPeriodComparator, dump_json, load_json
 
 
 class PowerOutageMonitor:
@@ -135,7 +134,7 @@ class PowerOutageMonitor:
             self.logger.info("=== STAGE 3: Enhanced database operations ===")
             self.logger.info("=" * 60)
             events_json_filepath = self.stage3_enhanced_database_operations(
-                json_filepath
+                json_filepath, json_data
             )
             if not events_json_filepath:
                 self.logger.error("Stage 3 failed - database operations")
@@ -152,21 +151,25 @@ class PowerOutageMonitor:
             return False, "error"
 
     def stage3_enhanced_database_operations(
-        self, json_filepath: Path
+        self, json_filepath: Optional[Path], data: Optional[Dict[str, Any]] = None
     ) -> Optional[Path]:
-        """Enhanced Stage 3: Database operations with smart overlap detection"""
+        """Enhanced Stage 3: Database operations with smart overlap detection
 
-        if not json_filepath or not json_filepath.exists():
-            self.logger.error("JSON file not found")
-            return None
+        The scraped data is used directly when given; the stored JSON file is
+        only read back when no in-memory data is passed.
+        """
 
-        try:
-            with open(json_filepath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self.logger.debug(f"Loaded JSON data: {len(data)}")
-        except Exception as e:
-            self.logger.error(f"Error loading JSON: {e}")
-            return None
+        if data is None:
+            if not json_filepath or not json_filepath.exists():
+                self.logger.error("JSON file not found")
+                return None
+
+            try:
+                data = load_json(json_filepath)
+                self.logger.debug(f"Loaded JSON data: {len(data)}")
+            except Exception as e:
+                self.logger.error(f"Error loading JSON: {e}")
+                return None
 
         # Convert to OutagePeriod objects
         try:
@@ -189,20 +192,8 @@ class PowerOutageMonitor:
         # Insert new periods into database
         try:
             self.logger.debug("Inserting periods into database...")
-
-            inserted_count = 0
-            inserted_periods = []
-
-            for period in filtered_periods:
-                try:
-                    recid = self.database.insert_period(period)
-                    period.recid = recid
-                    inserted_periods.append(period)
-                    inserted_count += 1
-                    self.logger.debug(f"Inserted period {recid} for {period.name}")
-                except Exception as e:
-                    self.logger.error(f"Error inserting period: {e}")
-
+            inserted_count = self.database.insert_periods(filtered_periods)
+            inserted_periods = filtered_periods
             self.logger.info(f"[OK] Inserted {inserted_count} new records")
         except Exception as e:
             self.logger.error(f"Error in database insertion: {e}")
@@ -282,8 +273,7 @@ class PowerOutageMonitor:
         filepath = self.config.ics_output_dir / filename
 
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            dump_json(result, filepath)
 
             self.logger.info(f"[OK] Enhanced calendar events JSON created: {filename}")
             self.logger.info(f"  Events to create: {len(events_to_create)}")
@@ -307,8 +297,7 @@ class PowerOutageMonitor:
             return
 
         try:
-            with open(events_json_filepath, "r", encoding="utf-8") as f:
-                events_data = json.load(f)
+            events_data = load_json(events_json_filepath)
         except Exception as e:
             self.logger.error(f"Error loading events JSON: {e}")
             return
@@ -330,20 +319,18 @@ class PowerOutageMonitor:
             )
 
             # Mark cancelled events as processed
-            for event in events_to_cancel:
-                self.database.update_calendar_event_state(event["recid"], "discarded")
-                self.logger.debug(
-                    f"Marked cancelled event {event['recid']} as discarded"
-                )
+            self.database.update_calendar_event_states(
+                [(event["recid"], "discarded") for event in events_to_cancel]
+            )
 
         # Generate ICS files for new events
         if events_to_create:
             self.ics_generator.generate_ics_files(events_to_create)
 
             # Mark created events as sent
-            for event in events_to_create:
-                self.database.mark_event_as_sent(event["recid"])
-                self.logger.debug(f"Marked event {event['recid']} as sent")
+            self.database.mark_events_as_sent(
+                [event["recid"] for event in events_to_create]
+            )
 
         self.logger.info(
             f"[OK] Enhanced calendar generation completed: {len(events_to_create)} created, {len(events_to_cancel)} cancelled"
@@ -356,7 +343,12 @@ class PowerOutageMonitor:
         )
         self.logger.info("Press Ctrl+C to stop")
 
+        interval_seconds = interval_minutes * 60
+
         while True:
+            # Checks start on a fixed cadence: time spent processing is taken
+            # out of the wait instead of being added to it
+            next_deadline = time.monotonic() + interval_seconds
             try:
                 success, status = self.run_full_process()
 
@@ -386,7 +378,7 @@ class PowerOutageMonitor:
                     self.logger.error("Моніторинг: помилка, статус: технічна проблема")
 
                 self.logger.info(f"Next check in {interval_minutes} minutes...")
-                time.sleep(interval_minutes * 60)
+                self._sleep_until(next_deadline)
 
             except KeyboardInterrupt:
                 self.logger.info("Monitoring stopped by user")
@@ -394,7 +386,14 @@ class PowerOutageMonitor:
             except Exception as e:
                 self.logger.error(f"Monitoring error: {e}")
                 self.logger.info(f"Retrying in {interval_minutes} minutes...")
-                time.sleep(interval_minutes * 60)
+                self._sleep_until(next_deadline)
+
+    @staticmethod
+    def _sleep_until(deadline: float) -> None:
+        """Sleep until the given time.monotonic() deadline, if still ahead."""
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
 
     def cleanup_old_data(self, days_to_keep: Optional[int] = None) -> int:
         """Clean up old data"""
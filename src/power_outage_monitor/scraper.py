@@ -1,19 +1,99 @@
 """Web scraping and parsing logic for Power Outage Monitor."""
 
-import json
+import atexit
 import re
-import time
+import urllib.request
+import weakref
 from datetime import datetime
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 import logging
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-import pytz
-
 from .db import OutagePeriod
+from .utils import dump_json, load_timezone
+
+# Selenium is imported where the browser is used: it takes longer to import
+# than the rest of the package and the static fetch usually makes it unneeded
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+# Match: "Графік погодинних відключень на 17.02.2026"
+_DATE_RE = re.compile(r"Графік погодинних відключень на (\d{2}\.\d{2}\.\d{4})")
+# Match: "Інформація станом на 14:30 17.02.2026"
+_UPDATE_RE = re.compile(r"Інформація станом на (\d{2}:\d{2} \d{2}\.\d{2}\.\d{4})")
+# Match: "14:30 17.02.2026" (the last update format used on the site)
+_LAST_UPDATE_RE = re.compile(r"\d{2}:\d{2} \d{2}\.\d{2}\.\d{4}$")
+# Match: "Група 1.1. Електроенергії немає з 09:00 до 12:00."
+_GROUP_RE = re.compile(
+    r"^(Група \d+\.\d+)\. (Електроенергії немає|Електроенергія є)(?: з (\d{2}:\d{2}) до (\d{2}:\d{2}))?\."
+)
+
+_SCHEDULE_SELECTOR = "div[class='power-off__text']"
+
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+class _PowerOffTextExtractor(HTMLParser):
+    """Collects the text of the div.power-off__text element from static HTML.
+
+    Mirrors rendered text: whitespace runs (including &nbsp;) inside a block
+    collapse to one space and lines break only at block boundaries.
+    """
+
+    BREAK_TAGS = {"br", "p", "div", "li"}
+
+    def __init__(self):
+        super().__init__()
+        self._depth = 0
+        self._lines: List[str] = []
+        self._current: List[str] = []
+
+    def _break_line(self) -> None:
+        # str.split() without arguments also splits on "\xa0"
+        line = " ".join("".join(self._current).split())
+        if line:
+            self._lines.append(line)
+        self._current = []
+
+    def handle_starttag(self, tag, attrs):
+        if self._depth:
+            if tag == "div":
+                self._depth += 1
+            if tag in self.BREAK_TAGS:
+                self._break_line()
+        elif tag == "div" and dict(attrs).get("class") == "power-off__text":
+            self._depth = 1
+
+    def handle_endtag(self, tag):
+        if self._depth:
+            if tag in self.BREAK_TAGS:
+                self._break_line()
+            if tag == "div":
+                self._depth -= 1
+
+    def handle_data(self, data):
+        if self._depth:
+            self._current.append(data)
+
+    @property
+    def text(self) -> str:
+        self._break_line()
+        return "\n".join(self._lines)
+
+
+# Scrapers that may hold a browser, quit at exit; weak references so the
+# exit hook does not keep discarded instances and their drivers alive
+_open_scrapers: "weakref.WeakSet[PowerOutageScraper]" = weakref.WeakSet()
+
+
+def _close_open_scrapers() -> None:
+    """Quit the browser of every live scraper at exit."""
+    for scraper in list(_open_scrapers):
+        scraper.close()
+
+
+atexit.register(_close_open_scrapers)
 
 
 class PowerOutageScraper:
@@ -26,20 +106,22 @@ class PowerOutageScraper:
         self.timeout = timeout
         self.headless = headless
         self.logger = logger
-        self.ukraine_tz = pytz.timezone("Europe/Kiev")
-        self.driver: Optional[webdriver.Chrome] = None
+        self.ukraine_tz = load_timezone("Europe/Kiev")
+        self.driver: Optional["webdriver.Chrome"] = None
+        _open_scrapers.add(self)
 
-    def _setup_driver(self) -> webdriver.Chrome:
+    def _setup_driver(self) -> "webdriver.Chrome":
         """Setup and return Chrome WebDriver."""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
         options = Options()
         if self.headless:
             options.add_argument("--headless")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
         options.add_argument("--disable-gpu")
-        options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        )
+        options.add_argument(f"--user-agent={_USER_AGENT}")
 
         try:
             driver = webdriver.Chrome(options=options)
@@ -49,6 +131,22 @@ class PowerOutageScraper:
             self.logger.error(f"Failed to setup Chrome driver: {e}")
             raise
 
+    def _get_driver(self) -> "webdriver.Chrome":
+        """Return the warm Chrome WebDriver, starting it on first use."""
+        if self.driver is None:
+            self.logger.info("Starting browser...")
+            self.driver = self._setup_driver()
+        return self.driver
+
+    def close(self) -> None:
+        """Quit the cached Chrome WebDriver, if any."""
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
+
     def get_ukraine_current_date(self) -> datetime.date:
         """Get current date in Ukraine timezone"""
         current_datetime_ukraine = datetime.now(self.ukraine_tz)
@@ -60,24 +158,20 @@ class PowerOutageScraper:
 
     def normalize_last_update(self, last_update_str: str) -> str:
         """Normalize last update string to standard format"""
+        # Dispatch on the string shape so the common site format never pays
+        # for a failed fromisoformat() and ISO input skips strptime()
         try:
-            dt = datetime.strptime(last_update_str, "%H:%M %d.%m.%Y")
-            return dt.strftime("%d.%m.%Y %H:%M")
-        except ValueError:
-            pass
-
-        try:
-            dt = datetime.fromisoformat(last_update_str)
-            return dt.strftime("%d.%m.%Y %H:%M")
+            if _LAST_UPDATE_RE.match(last_update_str):
+                dt = datetime.strptime(last_update_str, "%H:%M %d.%m.%Y")
+            else:
+                dt = datetime.fromisoformat(last_update_str)
         except ValueError:
-            pass
+            return last_update_str
 
-        return last_update_str
+        return dt.strftime("%d.%m.%Y %H:%M")
 
     def parse_power_off_text(self, text: str) -> Dict[str, Any]:
         """Parse Ukrainian power outage text into structured data"""
-        lines = [line.strip() for line in text.split("\n") if line.strip()]
-
         result = {
             "date": None,
             "last_update": None,
@@ -86,33 +180,29 @@ class PowerOutageScraper:
             "last_update_found": False,
         }
 
-        # Parse date line
-        for line in lines:
-            # Match: "Графік погодинних відключень на 17.02.2026"
-            m = re.match(r"Графік погодинних відключень на (\d{2}\.\d{2}\.\d{4})", line)
-            if m:
-                result["date"] = m.group(1)
-                result["date_found"] = True
-                break
-
-        # Parse last update line
-        for line in lines:
-            # Match: "Інформація станом на 14:30 17.02.2026"
-            m = re.match(
-                r"Інформація станом на (\d{2}:\d{2} \d{2}\.\d{2}\.\d{4})", line
-            )
-            if m:
-                result["last_update"] = self.normalize_last_update(m.group(1))
-                result["last_update_found"] = True
-                break
-
-        # Parse group lines with exact Ukrainian pattern
-        group_pattern = re.compile(
-            r"^(Група \d+\.\d+)\. (Електроенергії немає|Електроенергія є)(?: з (\d{2}:\d{2}) до (\d{2}:\d{2}))?\."
-        )
-
-        for line in lines:
-            m = group_pattern.match(line)
+        # Single pass: date and last update lines are taken from their first
+        # match only, group lines are collected from every match
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+
+            if not result["date_found"]:
+                m = _DATE_RE.match(line)
+                if m:
+                    result["date"] = m.group(1)
+                    result["date_found"] = True
+                    continue
+
+            if not result["last_update_found"]:
+                m = _UPDATE_RE.match(line)
+                if m:
+                    result["last_update"] = self.normalize_last_update(m.group(1))
+                    result["last_update_found"] = True
+                    continue
+
+            # Parse group lines with exact Ukrainian pattern
+            m = _GROUP_RE.match(line)
             if m:
                 group = {"name": m.group(1), "status": m.group(2)}
 
@@ -174,19 +264,80 @@ class PowerOutageScraper:
                 f"ГАВ розклад має некоректну дату: {parsed_data.get('date', 'невідома')}",
             )
 
+    def fetch_static_content(self) -> Optional[Dict[str, Any]]:
+        """Fetch the page over plain HTTP and parse it without a browser.
+
+        Returns None when the schedule text is not present in the static HTML
+        (e.g. it is rendered client-side), so the caller can fall back to Selenium.
+        """
+        try:
+            request = urllib.request.Request(
+                self.base_url, headers={"User-Agent": _USER_AGENT}
+            )
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                charset = response.headers.get_content_charset() or "utf-8"
+                html = response.read().decode(charset, errors="replace")
+        except Exception as e:
+            self.logger.debug(f"Static fetch failed: {e}")
+            return None
+
+        extractor = _PowerOffTextExtractor()
+        extractor.feed(html)
+        text = extractor.text
+        if len(text) <= 50:
+            self.logger.debug("Schedule text not found in static HTML")
+            return None
+
+        # Placeholders such as a "loading..." notice parse without a schedule
+        parsed = self.parse_power_off_text(text)
+        if not (
+            parsed["groups"] and parsed["date_found"] and parsed["last_update_found"]
+        ):
+            self.logger.debug("Static HTML has no schedule groups, date or update")
+            return None
+
+        # A group line the pattern cannot read means the static markup differs
+        # from the rendered page; a partial schedule must not be used
+        if any(
+            line.startswith("Група") and not _GROUP_RE.match(line)
+            for line in text.splitlines()
+        ):
+            self.logger.debug("Static HTML has unparsed group lines")
+            return None
+
+        return parsed
+
     def extract_dynamic_content(self) -> Optional[Dict[str, Any]]:
         """Extract dynamic content from the website"""
+        parsed = self.fetch_static_content()
+        if parsed:
+            self.logger.info("Schedule loaded without browser")
+            return parsed
+
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
         try:
-            self.driver = self._setup_driver()
-            self.logger.info("Starting browser...")
+            driver = self._get_driver()
             self.logger.info(f"Loading: {self.base_url}")
-            self.driver.get(self.base_url)
+            driver.get(self.base_url)
 
             self.logger.info("Waiting for content to load...")
-            time.sleep(5)
+            try:
+                WebDriverWait(driver, self.timeout).until(
+                    EC.text_to_be_present_in_element(
+                        (By.CSS_SELECTOR, _SCHEDULE_SELECTOR), "Група"
+                    )
+                )
+            except TimeoutException:
+                self.logger.warning(
+                    f"Schedule text did not appear within {self.timeout}s"
+                )
 
             # Try specific selectors first
-            selectors_to_try = ["div[class='power-off__text']"]
+            selectors_to_try = [_SCHEDULE_SELECTOR]
 
             found_content = False
             parsed = None
@@ -194,7 +345,7 @@ class PowerOutageScraper:
             for selector in selectors_to_try:
                 try:
                     self.logger.info(f"Trying selector: {selector}")
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
 
                     for i, element in enumerate(elements):
                         text = element.text.strip()
@@ -207,32 +358,28 @@ class PowerOutageScraper:
                         break
 
                 except Exception as e:
-                    print(f"  Error with {selector}: {e}")
+                    self.logger.debug(f"Error with {selector}: {e}")
 
             # If no specific content found, get all page text
             if not found_content:
-                print("No specific content found, getting all page text:")
-                all_text = self.driver.find_element(By.TAG_NAME, "body").text
+                self.logger.debug("No specific content found, using all page text")
+                all_text = driver.find_element(By.TAG_NAME, "body").text
                 parsed = self.parse_power_off_text(all_text)
 
-                # Save debug content
-                with open("selenium_all_content.txt", "w", encoding="utf-8") as f:
-                    f.write("All page content:\n")
-                    f.write("=" * 60 + "\n")
-                    f.write(all_text)
+                # Save debug content only when debugging
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    with open("selenium_all_content.txt", "w", encoding="utf-8") as f:
+                        f.write("All page content:\n")
+                        f.write("=" * 60 + "\n")
+                        f.write(all_text)
 
             return parsed
 
         except Exception as e:
-            print(f"Error: {e}")
             self.logger.error(f"Error during content extraction: {e}")
+            # Drop a possibly broken browser so the next poll starts fresh
+            self.close()
             return None
-        finally:
-            if self.driver:
-                try:
-                    self.driver.quit()
-                except Exception:
-                    pass
 
     def save_raw_data(self, data: Dict[str, Any], json_dir: Path) -> Optional[Path]:
         """Save scraped data to timestamped JSON file."""
@@ -247,8 +394,7 @@ class PowerOutageScraper:
         filepath = json_dir / filename
 
         try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            dump_json(data, filepath)
 
             self.logger.info(f"[OK] JSON stored: {filename}")
             return filepath
@@ -268,15 +414,21 @@ class PowerOutageScraper:
                 return periods
 
             insert_ts = datetime.now().isoformat()
+            date = data["date"]
+            last_update = data["last_update"]
 
             for group in data["groups"]:
-                period_from = group.get("period", {}).get("from", "")
-                period_to = group.get("period", {}).get("to", "")
+                group_period = group.get("period")
+                if group_period:
+                    period_from = group_period.get("from", "")
+                    period_to = group_period.get("to", "")
+                else:
+                    period_from = period_to = ""
 
                 period = OutagePeriod(
                     insert_ts=insert_ts,
-                    date=data["date"],
-                    last_update=data["last_update"],
+                    date=date,
+                    last_update=last_update,
                     name=group["name"],
                     status=group["status"],
                     period_from=period_from,
@@ -1,9 +1,68 @@
 """Utility functions for Power Outage Monitor with smart period comparison."""
 
-import re
-from typing import List, Optional
+import json
+from datetime import datetime, tzinfo
+from itertools import groupby
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Iterable, List, Optional
 import logging
 
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+try:
+    import orjson
+except ImportError:  # Optional speedup, see the "fast" extra
+    orjson = None
+
+
+def load_timezone(name: str) -> tzinfo:
+    """Load a timezone, preferring zoneinfo (Python 3.9+) over pytz."""
+    if ZoneInfo is not None:
+        try:
+            return ZoneInfo(name)
+        except Exception:
+            # No system tz database (e.g. Windows without tzdata)
+            pass
+
+    import pytz
+
+    return pytz.timezone(name)
+
+
+def localize(naive_dt: datetime, tz: tzinfo) -> datetime:
+    """Attach a timezone to a naive datetime; pytz zones need localize()."""
+    if hasattr(tz, "localize"):
+        return tz.localize(naive_dt)
+    return naive_dt.replace(tzinfo=tz)
+
+
+def dump_json(data: Any, filepath: Path) -> None:
+    """Write data as indented UTF-8 JSON, using orjson when installed."""
+    if orjson is not None:
+        # OPT_NON_STR_KEYS matches json's handling of int keys
+        content = orjson.dumps(
+            data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        )
+    else:
+        # Encode in one go; json.dump() issues a write per token
+        content = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+    with open(filepath, "wb") as f:
+        f.write(content)
+
+
+def load_json(filepath: Path) -> Any:
+    """Read a JSON file in one read, using orjson when installed."""
+    raw = Path(filepath).read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    # json.loads accepts UTF-8 bytes directly
+    return json.loads(raw)
+
 
 def normalize_time(time_str: str) -> str:
     """Normalize time string to HH:MM format with 24:00 -> 23:59 conversion."""
@@ -15,18 +74,15 @@ def normalize_time(time_str: str) -> str:
         return "23:59"
 
     # Handle different separators
-    time_str = re.sub(r"[.:]", ":", time_str)
+    time_str = time_str.replace(".", ":")
 
     # Ensure HH:MM format
-    if ":" in time_str:
-        parts = time_str.split(":")
-        if len(parts) == 2:
-            try:
-                hour = int(parts[0])  # CORRECT: First part is hour
-                minute = int(parts[1])  # CORRECT: Second part is minute
-                return f"{hour:02d}:{minute:02d}"
-            except ValueError:
-                pass
+    hour, sep, minute = time_str.partition(":")
+    if sep:
+        try:
+            return f"{int(hour):02d}:{int(minute):02d}"
+        except ValueError:
+            pass
 
     # If parsing fails, return original
     return time_str
@@ -37,9 +93,12 @@ def time_to_minutes(time_str: str) -> int:
     if not time_str:
         return 0
     try:
+        # Fast path for the zero-padded "HH:MM" values the scraper produces
+        if len(time_str) == 5 and time_str[2] == ":":
+            return int(time_str[:2]) * 60 + int(time_str[3:])
         hours, minutes = map(int, time_str.split(":"))
         return hours * 60 + minutes
-    except (ValueError, AttributeError):
+    except (ValueError, AttributeError, TypeError):
         return 0
 
 
@@ -99,8 +158,9 @@ def extract_group_code(group_name: str) -> str:
 class GroupFilter:
     """Handles group filtering logic with Ukrainian group code extraction."""
 
-    def __init__(self, group_filter: Optional[List[str]], logger: logging.Logger):
-        self.group_filter = set(group_filter) if group_filter else None
+    def __init__(self, group_filter: Optional[Iterable[str]], logger: logging.Logger):
+        # frozenset() of a frozenset (Config.group_filter) is free
+        self.group_filter = frozenset(group_filter) if group_filter else None
         self.logger = logger
 
     def should_include_period(self, period) -> bool:
@@ -145,6 +205,12 @@ class SmartPeriodComparator:
                     groups_by_name[period.name] = []
                 groups_by_name[period.name].append(period)
 
+            # Generated events for all affected (name, date) pairs in one
+            # query, kept up to date below as periods are processed
+            generated = database.get_generated_events(
+                {(period.name, period.date) for period in new_periods}
+            )
+
             # Process each group
             for name, new_group_periods in groups_by_name.items():
                 self.logger.debug(
@@ -152,12 +218,20 @@ class SmartPeriodComparator:
                 )
 
                 for new_period in new_group_periods:
-                    self._process_single_period(database, new_period)
+                    self._process_single_period(database, new_period, generated)
         except Exception as e:
             self.logger.error(f"Error in process_smart_period_comparisons: {e}")
 
-    def _process_single_period(self, database, new_period) -> None:
-        """Process a single new period with smart logic."""
+    def _process_single_period(self, database, new_period, generated=None) -> None:
+        """Process a single new period with smart logic.
+
+        ``generated`` maps (name, date) to the currently generated events; when
+        given, overlaps are checked against it and it is updated in place.
+        """
+        key = (new_period.name, new_period.date)
+        candidates = None
+        if generated is not None:
+            candidates = generated.setdefault(key, [])
 
         # Step 1: Check if identical event already exists and was sent
         identical_event = database.check_identical_event_exists(new_period)
@@ -169,7 +243,7 @@ class SmartPeriodComparator:
             return
 
         # Step 2: Find overlapping events
-        overlapping_events = database.find_overlapping_events(new_period)
+        overlapping_events = database.find_overlapping_events(new_period, candidates)
 
         if overlapping_events:
             self.logger.info(
@@ -188,6 +262,11 @@ class SmartPeriodComparator:
                 # Mark overlapping events for cancellation
                 database.mark_events_for_cancellation(overlapping_events)
 
+                if candidates is not None:
+                    cancelled = {event.recid for event in overlapping_events}
+                    candidates[:] = [e for e in candidates if e.recid not in cancelled]
+                    candidates.insert(0, new_period)
+
                 self.logger.info(
                     f"New event {new_period.calendar_event_id} will be generated, {len(overlapping_events)} events marked for cancellation"
                 )
@@ -200,6 +279,8 @@ class SmartPeriodComparator:
         else:
             # No overlaps, generate new event
             database.update_calendar_event_state(new_period.recid, "generated")
+            if candidates is not None:
+                candidates.insert(0, new_period)
             self.logger.info(
                 f"No overlaps found, generating new event {new_period.calendar_event_id}"
             )
@@ -239,6 +320,20 @@ class PeriodComparator:
                 groups_by_name[period.name] = []
             groups_by_name[period.name].append(period)
 
+        if not groups_by_name:
+            return
+
+        # Get existing records for the current date in one query, already
+        # ordered by name, last_update DESC, insert_ts DESC
+        existing_by_name = {
+            name: list(group_periods)
+            for name, group_periods in groupby(
+                database.get_periods_by_date(current_date_ukraine),
+                key=attrgetter("name"),
+            )
+            if name in groups_by_name
+        }
+
         # Process each group
         for name, new_group_periods in groups_by_name.items():
             if not new_group_periods:
@@ -249,10 +344,7 @@ class PeriodComparator:
                 f"Processing group '{name}' with {len(new_group_periods)} new periods"
             )
 
-            # Get existing records for this group AND current date only
-            all_existing_periods = database.get_periods_by_name_and_date(
-                name, current_date_ukraine
-            )
+            all_existing_periods = existing_by_name.get(name)
 
             if not all_existing_periods:
                 self.logger.warning(
@@ -260,11 +352,6 @@ class PeriodComparator:
                 )
                 continue
 
-            # Sort all existing periods by last_update DESC, then insert_ts DESC
-            all_existing_periods.sort(
-                key=lambda x: (x.last_update, x.insert_ts), reverse=True
-            )
-
             self.logger.debug(
                 f"Found {len(all_existing_periods)} total periods for '{name}' on {current_date_ukraine}"
             )
@@ -275,13 +362,12 @@ class PeriodComparator:
             if latest_period.status == "Електроенергія є":
                 # For "power available" status, mark latest as generated, others as discarded
                 self.logger.debug(f"Processing 'Електроенергія є' status for '{name}'")
+                state_updates = []
                 for i, period in enumerate(all_existing_periods):
                     state = "generated" if i == 0 else "discarded"
                     if period.calendar_event_state != state:
-                        database.update_calendar_event_state(period.recid, state)
-                        self.logger.debug(
-                            f"Updated period {period.recid} to state '{state}'"
-                        )
+                        state_updates.append((period.recid, state))
+                database.update_calendar_event_states(state_updates)
             else:
                 # For "power outage" status, process period intersections
                 self.logger.debug(
@@ -309,10 +395,9 @@ class PeriodComparator:
                 f"No time periods found for '{group_name}', marking latest as generated"
             )
             latest = all_periods[0]
-            database.update_calendar_event_state(latest.recid, "generated")
-
-            for period in all_periods[1:]:
-                database.update_calendar_event_state(period.recid, "discarded")
+            state_updates = [(latest.recid, "generated")]
+            state_updates.extend((p.recid, "discarded") for p in all_periods[1:])
+            database.update_calendar_event_states(state_updates)
             return
 
         # Periods are already sorted by last_update DESC, insert_ts DESC
@@ -322,33 +407,24 @@ class PeriodComparator:
             f"Latest period for '{group_name}': {latest_record.period_from}-{latest_record.period_to}, last_update={latest_record.last_update}"
         )
 
+        state_updates = []
+
         # Mark latest as generated
         if latest_record.calendar_event_state != "generated":
-            database.update_calendar_event_state(latest_record.recid, "generated")
+            state_updates.append((latest_record.recid, "generated"))
             self.logger.debug(
                 f"Marked latest period {latest_record.recid} as 'generated'"
             )
 
-        # Check intersections with older records
-        for older_record in period_records[1:]:
-            if self._periods_intersect_objects(latest_record, older_record):
-                state = "discarded"
-                self.logger.debug(
-                    f"Period {older_record.recid} intersects with latest, marking as 'discarded'"
-                )
-            else:
-                state = (
-                    "discarded"  # In original logic, all older records are discarded
-                )
-                self.logger.debug(
-                    f"Period {older_record.recid} doesn't intersect but marking as 'discarded' (original logic)"
-                )
+        # All older records are discarded whether or not they intersect the
+        # latest one, so no intersection check is needed
+        state_updates.extend(
+            (older_record.recid, "discarded")
+            for older_record in period_records[1:]
+            if older_record.calendar_event_state != "discarded"
+        )
 
-            if older_record.calendar_event_state != state:
-                database.update_calendar_event_state(older_record.recid, state)
-                self.logger.debug(
-                    f"Updated period {older_record.recid} to state '{state}'"
-                )
+        database.update_calendar_event_states(state_updates)
 
     def _periods_intersect_objects(self, period1, period2) -> bool:
         """Check if two period objects intersect."""
@@ -1,11 +1,29 @@
 """Tests for configuration management."""
 
+import dataclasses
+import io
 import tempfile
+import threading
+import time
 import json
+import logging
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
-from power_outage_monitor.config import Config, parse_arguments
+import pytest
+
+from power_outage_monitor import config as config_module
+from power_outage_monitor.config import (
+    BufferedFileHandler,
+    Config,
+    FastFormatter,
+    PeriodicFlusher,
+    _ensure_utf8,
+    parse_arguments,
+    parse_group_input,
+    setup_logging,
+    stop_logging,
+)
 
 
 class TestConfig:
@@ -58,7 +76,7 @@ class TestConfig:
         """Test argument parsing with group filtering."""
         with patch("sys.argv", ["main.py", "--groups", "1.1,2.1,3.2"]):
             config = parse_arguments()
-            assert config.group_filter == ["1.1", "2.1", "3.2"]
+            assert config.group_filter == frozenset({"1.1", "2.1", "3.2"})
 
     def test_parse_arguments_continuous(self):
         """Test argument parsing with continuous monitoring."""
@@ -76,6 +94,207 @@ class TestConfig:
         try:
             with patch("sys.argv", ["main.py", "--groups-file", groups_file]):
                 config = parse_arguments()
-                assert config.group_filter == ["1.1", "2.1"]
+                assert config.group_filter == frozenset({"1.1", "2.1"})
         finally:
             Path(groups_file).unlink()
+
+    def test_setup_logging_writes_through_queue(self, tmp_path):
+        """Test that queued records reach the log file once logging stops."""
+        log_file = tmp_path / "monitor.log"
+        logger = setup_logging(Config(log_file=log_file, log_level="INFO"))
+        try:
+            logger.info("queued message")
+            logger.error("flushed message")
+        finally:
+            stop_logging()
+
+        content = log_file.read_text(encoding="utf-8")
+        assert "INFO - queued message" in content
+        assert "ERROR - flushed message" in content
+
+    def test_setup_logging_again_closes_previous_file(self, tmp_path):
+        """Test that reconfiguring logging flushes and closes the old log file."""
+        first_file = tmp_path / "first.log"
+        second_file = tmp_path / "second.log"
+        logger = setup_logging(Config(log_file=first_file, log_level="INFO"))
+        try:
+            logger.info("buffered before reconfigure")
+            logger.info("still buffered")
+            (first_handler,) = config_module._log_listener.handlers
+            logger = setup_logging(Config(log_file=second_file, log_level="INFO"))
+            logger.info("after reconfigure")
+        finally:
+            stop_logging()
+
+        assert first_handler.stream is None
+        first = first_file.read_text(encoding="utf-8")
+        assert "buffered before reconfigure" in first
+        assert "still buffered" in first
+        assert "after reconfigure" not in first
+        assert "after reconfigure" in second_file.read_text(encoding="utf-8")
+
+    def test_setup_logging_console_keeps_print_order(self, tmp_path, capsys):
+        """Test that console log lines stay in order with print() output."""
+        logger = setup_logging(
+            Config(log_file=tmp_path / "monitor.log", log_level="INFO")
+        )
+        try:
+            for i in range(1, 4):
+                print(f"=== BANNER {i} ===")
+                logger.info(f"line {i} after banner {i}")
+        finally:
+            stop_logging()
+
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split(" - ")[-1] for line in lines] == [
+            "=== BANNER 1 ===",
+            "line 1 after banner 1",
+            "=== BANNER 2 ===",
+            "line 2 after banner 2",
+            "=== BANNER 3 ===",
+            "line 3 after banner 3",
+        ]
+
+    def test_parse_group_input_reloads_changed_file(self, tmp_path):
+        """Test that the group file cache is invalidated when the file changes."""
+        groups_file = tmp_path / "groups.json"
+        groups_file.write_text(json.dumps({"group": ["1.1"]}), encoding="utf-8")
+        assert parse_group_input(None, str(groups_file)) == frozenset({"1.1"})
+        assert parse_group_input(None, str(groups_file)) == frozenset({"1.1"})
+
+        groups_file.write_text(json.dumps({"group": ["2.1", "3.2"]}), encoding="utf-8")
+        assert parse_group_input(None, str(groups_file)) == frozenset({"2.1", "3.2"})
+
+    def test_parse_group_input_invalid_json_logs_warning(self, tmp_path, caplog):
+        """Test that an unreadable group file is logged and ignored."""
+        groups_file = tmp_path / "groups.json"
+        groups_file.write_text("{not json", encoding="utf-8")
+        with caplog.at_level(logging.WARNING):
+            assert parse_group_input(None, str(groups_file)) is None
+        assert "Could not read group codes" in caplog.text
+
+    def test_parse_group_input_missing_file(self, tmp_path):
+        """Test that a missing group file yields no filter."""
+        assert parse_group_input(None, str(tmp_path / "missing.json")) is None
+
+    def test_config_is_frozen(self):
+        """Test that Config is immutable and hashable."""
+        config = Config(group_filter=frozenset({"1.1"}))
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            config.check_interval = 60
+        assert hash(config) == hash(Config(group_filter=frozenset({"1.1"})))
+
+    def test_setup_logging_opens_log_file_lazily(self, tmp_path):
+        """Test that the log file and its directory appear only as needed."""
+        log_file = tmp_path / "logs" / "monitor.log"
+        logger = setup_logging(Config(log_file=log_file, log_level="INFO"))
+        try:
+            assert log_file.parent.is_dir()
+            assert not log_file.exists()
+            logger.error("first record")
+        finally:
+            stop_logging()
+
+        assert "first record" in log_file.read_text(encoding="utf-8")
+
+    def test_parse_arguments_from_argv(self):
+        """Test parsing an explicit argument list with the cached parser."""
+        config = parse_arguments(["--interval", "60", "--groups", "4.1"])
+        assert config.check_interval == 60
+        assert config.group_filter == frozenset({"4.1"})
+
+        config = parse_arguments([])
+        assert config.check_interval == 300
+
+    @pytest.mark.parametrize("debug", [False, True])
+    def test_fast_formatter_matches_logging_formatter(self, debug):
+        """Test that FastFormatter output is identical to logging.Formatter."""
+        fast = FastFormatter(debug=debug)
+        reference = logging.Formatter(fast._fmt)
+        for created in (1700000000.123, 1700000000.987, 1700000001.5):
+            record = logging.LogRecord(
+                "test", logging.INFO, "module.py", 42, "value %s", ("x",), None
+            )
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+            assert fast.format(record) == reference.format(record)
+
+    def test_fast_formatter_shared_across_threads(self):
+        """Test that records formatted from two threads keep their own second."""
+        fast = FastFormatter()
+        reference = logging.Formatter(fast._fmt)
+        records = []
+        for created in (1700000000.25, 1700000001.75) * 200:
+            record = logging.LogRecord(
+                "test", logging.INFO, "module.py", 42, "msg", None, None
+            )
+            record.created = created
+            record.msecs = (created - int(created)) * 1000
+            records.append(record)
+
+        results = {}
+
+        def format_all(name, batch):
+            results[name] = [fast.formatTime(record) for record in batch]
+
+        threads = [
+            threading.Thread(target=format_all, args=(i, records[i::2]))
+            for i in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for i in range(2):
+            expected = [reference.formatTime(record) for record in records[i::2]]
+            assert results[i] == expected
+
+    def test_ensure_utf8_only_reconfigures_other_encodings(self):
+        """Test that UTF-8 streams are left alone."""
+        cp1251 = io.TextIOWrapper(io.BytesIO(), encoding="cp1251")
+        _ensure_utf8(cp1251)
+        assert cp1251.encoding == "utf-8"
+
+        utf8 = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+        with patch.object(utf8, "reconfigure", create=True) as reconfigure:
+            _ensure_utf8(utf8)
+        reconfigure.assert_not_called()
+
+    def test_config_log_level_num(self):
+        """Test that the numeric log level is resolved from the level name."""
+        assert Config().log_level_num == logging.INFO
+        assert Config(log_level="debug").log_level_num == logging.DEBUG
+        assert Config(log_level="bogus").log_level_num == logging.INFO
+
+    def test_periodic_flusher_flushes_handlers(self):
+        """Test that the flusher thread flushes handlers until stopped."""
+        handler = MagicMock()
+        flusher = PeriodicFlusher([handler], interval=0.01)
+        flusher.start()
+        try:
+            deadline = time.monotonic() + 2
+            while not handler.flush.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            flusher.stop()
+
+        assert handler.flush.called
+        assert not flusher.is_alive()
+
+    def test_buffered_file_handler_appends_utf8(self, tmp_path):
+        """Test that records are appended to existing content as UTF-8."""
+        log_file = tmp_path / "monitor.log"
+        log_file.write_bytes(b"existing\n")
+        handler = BufferedFileHandler(log_file)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        record = logging.LogRecord(
+            "test", logging.INFO, "module.py", 1, "Група 1.1", None, None
+        )
+        try:
+            handler.handle(record)
+            assert log_file.read_bytes() == b"existing\n"
+        finally:
+            handler.close()
+
+        assert log_file.read_text(encoding="utf-8") == "existing\nГрупа 1.1\n"
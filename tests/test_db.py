@@ -1,13 +1,23 @@
 """Tests for database operations."""
 
+import gc
+import hashlib
 import pytest
 import tempfile
 import sqlite3
 import logging
+import time
+import weakref
 from datetime import datetime, timedelta
 from pathlib import Path
 
-from power_outage_monitor.db import PowerOutageDatabase, OutagePeriod
+from power_outage_monitor.db import (
+    SCHEMA_VERSION,
+    OutagePeriod,
+    PowerOutageDatabase,
+    _close_open_databases,
+    _events_for_generation_sql,
+)
 
 
 class TestPowerOutageDatabase:
@@ -26,8 +36,8 @@ class TestPowerOutageDatabase:
         db = PowerOutageDatabase(db_path, logger)
         yield db
 
-        # Cleanup - the database doesn't have a close method,
-        # connections are handled automatically with context managers
+        # Cleanup - close cached connections before removing the file
+        db.close()
         try:
             if db_path.exists():
                 db_path.unlink()
@@ -61,6 +71,61 @@ class TestPowerOutageDatabase:
             for table in expected_tables:
                 assert table in tables
 
+    def test_database_uses_wal_mode(self, temp_db):
+        """Test that the database file is switched to WAL journaling."""
+        with sqlite3.connect(temp_db.db_path) as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode == "wal"
+
+    def test_events_for_generation_uses_state_index(self, temp_db):
+        """Test that the generation query is served by the composite index."""
+        conn = temp_db._read_connection()
+        for groups in ((), ("1.1", "2.1")):
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN " + _events_for_generation_sql(len(groups)),
+                ("2024-01-01",) + groups,
+            ).fetchall()
+            details = " ".join(row[-1] for row in plan)
+            assert "idx_periods_state_sent_group" in details
+            assert "SCAN" not in details.replace("SCAN CONSTANT ROW", "")
+
+        indexes = {
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        }
+        assert "idx_periods_state" not in indexes
+
+    def test_cached_connections(self, temp_db):
+        """Test that connections are reused and the read side is read-only."""
+        assert temp_db._write_connection() is temp_db._write_connection()
+        assert temp_db._read_connection() is temp_db._read_connection()
+
+        with pytest.raises(sqlite3.OperationalError):
+            temp_db._read_connection().execute("DELETE FROM periods")
+
+        for conn in (temp_db._write_connection(), temp_db._read_connection()):
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+        temp_db.close()
+        assert temp_db._read_conn is None
+        assert temp_db._write_conn is None
+        assert temp_db.get_comprehensive_stats()["total_records"] == 0
+
+    def test_discarded_database_is_not_kept_alive(self, temp_db):
+        """Test the exit hook closes live databases without pinning old ones."""
+        temp_db._read_connection()
+        other = PowerOutageDatabase(temp_db.db_path, temp_db.logger)
+        other._write_connection()
+        other_ref = weakref.ref(other)
+
+        del other
+        gc.collect()
+        assert other_ref() is None
+
+        _close_open_databases()
+        assert temp_db._read_conn is None
+
     def test_insert_period(self, temp_db, sample_outage_period):
         """Test inserting an outage period."""
         recid = temp_db.insert_period(sample_outage_period)
@@ -75,6 +140,30 @@ class TestPowerOutageDatabase:
 
             assert row is not None
 
+    def test_insert_periods(self, temp_db, sample_outage_period):
+        """Test inserting several outage periods in one batch."""
+        other_period = OutagePeriod(
+            date="15.01.2024",
+            name="Група 2.1",
+            status="Електроенергії немає",
+            period_from="13:00",
+            period_to="16:00",
+            last_update="2024-01-15T10:00:00",
+        )
+
+        assert temp_db.insert_periods([]) == 0
+        assert temp_db.insert_periods([sample_outage_period, other_period]) == 2
+
+        with sqlite3.connect(temp_db.db_path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM periods").fetchone()[0]
+        assert count == 2
+
+    def test_insert_periods_from_generator(self, temp_db, sample_outage_period):
+        """Test inserting periods streamed from a generator."""
+        assert temp_db.insert_periods(p for p in [sample_outage_period]) == 1
+        assert temp_db.insert_periods(p for p in []) == 0
+        assert len(temp_db.get_periods_by_date(sample_outage_period.date)) == 1
+
     def test_get_periods_by_name_and_date(self, temp_db, sample_outage_period):
         """Test retrieving periods by name and date."""
         # Insert the period first
@@ -89,6 +178,32 @@ class TestPowerOutageDatabase:
         assert periods[0].name == "Група 1.1"
         assert periods[0].date == "15.01.2024"
 
+    def test_get_periods_by_date(self, temp_db):
+        """Test retrieving periods for a date ordered by name and last update."""
+        temp_db.insert_periods(
+            [
+                OutagePeriod(
+                    date="15.01.2024",
+                    name=name,
+                    status="Електроенергії немає",
+                    last_update=last_update,
+                )
+                for name, last_update in [
+                    ("Група 2.1", "15.01.2024 08:00"),
+                    ("Група 1.1", "15.01.2024 08:00"),
+                    ("Група 1.1", "15.01.2024 09:00"),
+                ]
+            ]
+        )
+
+        periods = temp_db.get_periods_by_date("15.01.2024")
+
+        assert [(p.name, p.last_update) for p in periods] == [
+            ("Група 1.1", "15.01.2024 09:00"),
+            ("Група 1.1", "15.01.2024 08:00"),
+            ("Група 2.1", "15.01.2024 08:00"),
+        ]
+
     def test_update_calendar_event_state(self, temp_db, sample_outage_period):
         """Test updating calendar event state."""
         # Insert period first
@@ -106,6 +221,29 @@ class TestPowerOutageDatabase:
         assert len(periods) == 1
         assert periods[0].calendar_event_state == "generated"
 
+    def test_update_calendar_event_states(self, temp_db):
+        """Test updating several calendar event states at once."""
+        periods = [
+            OutagePeriod(
+                date="15.01.2024",
+                name=f"Група {code}",
+                status="Електроенергії немає",
+                last_update="2024-01-15T10:00:00",
+            )
+            for code in ["1.1", "2.1"]
+        ]
+        temp_db.insert_periods(periods)
+
+        temp_db.update_calendar_event_states(
+            [(periods[0].recid, "generated"), (periods[1].recid, "discarded")]
+        )
+
+        states = {
+            p.name: p.calendar_event_state
+            for p in temp_db.get_periods_by_date("15.01.2024")
+        }
+        assert states == {"Група 1.1": "generated", "Група 2.1": "discarded"}
+
     def test_mark_event_as_sent(self, temp_db, sample_outage_period):
         """Test marking an event as sent."""
         # Insert period first
@@ -122,6 +260,62 @@ class TestPowerOutageDatabase:
         assert len(periods) == 1
         assert periods[0].event_sent is True
 
+    def test_mark_events_as_sent(self, temp_db, sample_outage_period):
+        """Test marking several events as sent at once."""
+        recids = temp_db.insert_periods(
+            [
+                sample_outage_period,
+                OutagePeriod(
+                    insert_ts="2024-01-15T11:00:00",
+                    date=sample_outage_period.date,
+                    last_update="15.01.2024 11:00",
+                    name=sample_outage_period.name,
+                    status=sample_outage_period.status,
+                    period_from="18:00",
+                    period_to="20:00",
+                ),
+            ]
+        )
+
+        temp_db.mark_events_as_sent(
+            [p.recid for p in temp_db.get_periods_by_date(sample_outage_period.date)]
+        )
+
+        periods = temp_db.get_periods_by_name_and_date(
+            sample_outage_period.name, sample_outage_period.date
+        )
+        assert recids == 2
+        assert len(periods) == 2
+        assert all(p.event_sent for p in periods)
+
+    def test_mark_events_for_cancellation(self, temp_db, sample_outage_period, caplog):
+        """Test cancelling several events in one batch."""
+        temp_db.insert_periods(
+            [
+                sample_outage_period,
+                OutagePeriod(
+                    insert_ts="2024-01-15T11:00:00",
+                    date=sample_outage_period.date,
+                    last_update="15.01.2024 11:00",
+                    name=sample_outage_period.name,
+                    status=sample_outage_period.status,
+                    period_from="18:00",
+                    period_to="20:00",
+                ),
+            ]
+        )
+        periods = temp_db.get_periods_by_date(sample_outage_period.date)
+
+        with caplog.at_level(logging.INFO):
+            temp_db.mark_events_for_cancellation(periods)
+            temp_db.mark_events_for_cancellation([])
+        assert caplog.text.count("for cancellation due to overlap") == 1
+        assert "Marked 2 event(s)" in caplog.text
+
+        cancelled = temp_db.get_periods_by_date(sample_outage_period.date)
+        assert {p.calendar_event_state for p in cancelled} == {"cancelled"}
+        assert len({p.calendar_event_ts for p in cancelled}) == 1
+
     def test_get_events_for_generation(self, temp_db, sample_outage_period):
         """Test getting events for generation."""
         # Create a period with a future date (or today's date)
@@ -153,6 +347,64 @@ class TestPowerOutageDatabase:
         assert len(events["events_to_create"]) == 1
         assert events["events_to_create"][0].name == "Група 1.1"
 
+    def test_get_events_for_generation_with_cancellations(self, temp_db):
+        """Test create and cancel lists come back split and group-filtered."""
+        future_date_str = (
+            temp_db.get_ukraine_current_date() + timedelta(days=1)
+        ).strftime("%d.%m.%Y")
+
+        def make(name, period_from, period_to):
+            return OutagePeriod(
+                date=future_date_str,
+                name=name,
+                status="Електроенергії немає",
+                period_from=period_from,
+                period_to=period_to,
+                last_update=datetime.now().isoformat(),
+            )
+
+        to_create = make("Група 1.1", "09:00", "12:00")
+        to_cancel = make("Група 1.1", "13:00", "15:00")
+        other_group = make("Група 2.1", "09:00", "12:00")
+        for period in (to_create, to_cancel, other_group):
+            period.recid = temp_db.insert_period(period)
+        temp_db.update_calendar_event_states(
+            [
+                (to_create.recid, "generated"),
+                (to_cancel.recid, "cancelled"),
+                (other_group.recid, "generated"),
+            ]
+        )
+        temp_db.mark_event_as_sent(to_cancel.recid)
+
+        events = temp_db.get_events_for_generation(group_filter=["1.1"])
+
+        assert [p.recid for p in events["events_to_create"]] == [to_create.recid]
+        assert [p.recid for p in events["events_to_cancel"]] == [to_cancel.recid]
+
+    def test_get_events_for_generation_deduplicates(self, temp_db):
+        """Test the same event posted on several refreshes is created once."""
+        future_date_str = (
+            temp_db.get_ukraine_current_date() + timedelta(days=1)
+        ).strftime("%d.%m.%Y")
+        periods = [
+            OutagePeriod(
+                date=future_date_str,
+                name="Група 1.1",
+                status="Електроенергії немає",
+                period_from="09:00",
+                period_to="12:00",
+                last_update=last_update,
+            )
+            for last_update in ("08:00", "08:30", "09:00")
+        ]
+        temp_db.insert_periods(periods)
+        temp_db.update_calendar_event_states([(p.recid, "generated") for p in periods])
+
+        events = temp_db.get_events_for_generation()
+
+        assert len(events["events_to_create"]) == 1
+
     def test_cleanup_old_data(self, temp_db):
         """Test cleaning up old data."""
         # Create an old period (with old insert_ts)
@@ -183,9 +435,10 @@ class TestPowerOutageDatabase:
         deleted_count = temp_db.cleanup_old_data(days_to_keep=30)
 
         # Should have deleted the old record
-        assert (
-            deleted_count >= 0
-        )  # At least 0 (might be 1 if the old record was actually deleted)
+        assert deleted_count == 1
+        assert [p.recid for p in temp_db.get_periods_by_date("01.01.2000")] == [
+            recent_period.recid
+        ]
 
     def test_get_comprehensive_stats(self, temp_db, sample_outage_period):
         """Test getting comprehensive statistics."""
@@ -199,6 +452,30 @@ class TestPowerOutageDatabase:
         assert "unique_dates" in stats
         assert "unique_groups" in stats
         assert stats["total_records"] >= 1
+        assert stats["unique_dates"] == 1
+        assert stats["unique_groups"] == 1
+        assert stats["date_range"] == {"from": "15.01.2024", "to": "15.01.2024"}
+        assert stats["last_24h_records"] == 1
+        assert stats["by_state"] == {"pending": 1}
+        assert stats["events_sent"] == 0
+        assert stats["events_pending"] == 0
+
+        temp_db.update_calendar_event_state(sample_outage_period.recid, "generated")
+        assert temp_db.get_comprehensive_stats()["events_pending"] == 1
+        temp_db.mark_event_as_sent(sample_outage_period.recid)
+        stats = temp_db.get_comprehensive_stats()
+        assert stats["events_sent"] == 1
+        assert stats["events_pending"] == 0
+
+    def test_get_comprehensive_stats_empty(self, temp_db):
+        """Test statistics on an empty database keep their defaults."""
+        stats = temp_db.get_comprehensive_stats()
+
+        assert stats["total_records"] == 0
+        assert stats["last_24h_records"] == 0
+        assert stats["events_sent"] == 0
+        assert stats["date_range"] == {"from": None, "to": None}
+        assert stats["by_state"] == {}
 
     def test_export_to_csv(self, temp_db, sample_outage_period):
         """Test exporting data to CSV."""
@@ -218,6 +495,7 @@ class TestPowerOutageDatabase:
             content = csv_path.read_text(encoding="utf-8")
             assert "Date" in content  # Header
             assert "Група 1.1" in content  # Our test data
+            assert len(content.splitlines()) == 2  # Header + one row
 
         finally:
             # Cleanup
@@ -249,6 +527,130 @@ class TestPowerOutageDatabase:
 
         assert existing.name == "Група 1.1"
 
+    def test_find_overlapping_events(self, temp_db):
+        """Test overlap detection against generated events, including overnight."""
+
+        def make(period_from, period_to, last_update):
+            return OutagePeriod(
+                date="15.01.2024",
+                name="Група 1.1",
+                status="Електроенергії немає",
+                period_from=period_from,
+                period_to=period_to,
+                last_update=last_update,
+            )
+
+        overnight = make("22:00", "02:00", "15.01.2024 08:00")
+        morning = make("09:00", "12:00", "15.01.2024 08:30")
+        for period in (overnight, morning):
+            period.recid = temp_db.insert_period(period)
+        temp_db.update_calendar_event_states(
+            [(overnight.recid, "generated"), (morning.recid, "generated")]
+        )
+
+        late = make("23:00", "23:30", "15.01.2024 09:00")
+        late.recid = temp_db.insert_period(late)
+        assert [p.recid for p in temp_db.find_overlapping_events(late)] == [
+            overnight.recid
+        ]
+
+        midday = make("13:00", "15:00", "15.01.2024 09:00")
+        assert temp_db.find_overlapping_events(midday) == []
+
+        # A period without times overlaps every generated event of its status
+        all_day = make(None, None, "15.01.2024 09:00")
+        assert len(temp_db.find_overlapping_events(all_day)) == 2
+
+    def test_event_hash(self):
+        """Test that event hashes stay MD5 and supplied hashes are kept."""
+        period = OutagePeriod(
+            date="2024-01-15",
+            name="Група 1.1",
+            status="Електроенергії немає",
+            period_from="08:00",
+            period_to="12:00",
+        )
+        expected = hashlib.md5(
+            "2024-01-15|Група 1.1|Електроенергії немає|08:00|12:00".encode()
+        ).hexdigest()
+        assert period.event_hash == expected
+        stored = OutagePeriod(date="2024-01-15", event_hash="stored")
+        assert stored.event_hash == "stored"
+
+    def test_schema_upgrade_backfills_uid_and_hash(self, temp_db, sample_outage_period):
+        """Test that reopening the database backfills missing UIDs and hashes."""
+        temp_db.insert_period(sample_outage_period)
+        temp_db.insert_period(
+            OutagePeriod(
+                date="15.01.2024",
+                name="Група 2.1",
+                status="Електроенергії немає",
+                last_update="2024-01-15T10:00:00",
+            )
+        )
+        with sqlite3.connect(temp_db.db_path) as conn:
+            conn.execute("UPDATE periods SET calendar_event_uid = NULL, event_hash = NULL")
+            conn.execute("UPDATE metadata SET value = '4.0' WHERE key = 'schema_version'")
+
+        PowerOutageDatabase(temp_db.db_path, temp_db.logger)
+
+        with sqlite3.connect(temp_db.db_path) as conn:
+            rows = conn.execute(
+                "SELECT name, calendar_event_uid, event_hash FROM periods ORDER BY name"
+            ).fetchall()
+
+        assert len(rows) == 2
+        assert all(uid and uid.endswith("@power-monitor") for _, uid, _ in rows)
+        assert len({uid for _, uid, _ in rows}) == 2
+        assert rows[0][2] == sample_outage_period.event_hash
+
+    def test_current_schema_skips_upgrade(self, temp_db, sample_outage_period):
+        """Test that a database at SCHEMA_VERSION is not re-scanned on open."""
+        temp_db.insert_period(sample_outage_period)
+        with sqlite3.connect(temp_db.db_path) as conn:
+            conn.execute("UPDATE periods SET calendar_event_uid = NULL")
+            version = conn.execute(
+                "SELECT value FROM metadata WHERE key = 'schema_version'"
+            ).fetchone()[0]
+        assert version == SCHEMA_VERSION
+
+        PowerOutageDatabase(temp_db.db_path, temp_db.logger)
+
+        with sqlite3.connect(temp_db.db_path) as conn:
+            uid = conn.execute("SELECT calendar_event_uid FROM periods").fetchone()[0]
+        assert uid is None
+
+    def test_minute_spans_stored_and_backfilled(self, temp_db):
+        """Test that timed periods store minute spans, also after an upgrade."""
+        temp_db.insert_periods(
+            [
+                OutagePeriod(
+                    date="15.01.2024",
+                    name=name,
+                    status="Електроенергії немає",
+                    last_update="15.01.2024 08:00",
+                    period_from=period_from,
+                    period_to=period_to,
+                )
+                for name, period_from, period_to in (
+                    ("Група 1.1", "08:00", "12:00"),
+                    ("Група 2.1", "22:00", "02:00"),
+                    ("Група 3.1", None, None),
+                )
+            ]
+        )
+        query = "SELECT period_from_min, period_to_min FROM periods ORDER BY name"
+        expected = [(480, 720), (1320, 1560), (None, None)]
+        with sqlite3.connect(temp_db.db_path) as conn:
+            assert conn.execute(query).fetchall() == expected
+            conn.execute("UPDATE periods SET period_from_min = NULL, period_to_min = NULL")
+            conn.execute("UPDATE metadata SET value = '4.0' WHERE key = 'schema_version'")
+
+        PowerOutageDatabase(temp_db.db_path, temp_db.logger)
+
+        with sqlite3.connect(temp_db.db_path) as conn:
+            assert conn.execute(query).fetchall() == expected
+
     def test_ukraine_timezone_methods(self, temp_db):
         """Test Ukraine timezone related methods."""
         current_date = temp_db.get_ukraine_current_date()
@@ -257,3 +659,16 @@ class TestPowerOutageDatabase:
         assert current_date is not None
         assert isinstance(current_date_str, str)
         assert len(current_date_str) > 0
+
+    def test_ukraine_current_date_str_cached_until_midnight(self, temp_db):
+        """Test that the date string is reused until the next local midnight."""
+        date_str = temp_db.get_ukraine_current_date_str()
+        expires = temp_db._date_str_expires
+        assert date_str == temp_db.get_ukraine_current_date().strftime("%d.%m.%Y")
+        assert 0 < expires - time.time() <= 25 * 3600
+
+        temp_db._date_str = "cached"
+        assert temp_db.get_ukraine_current_date_str() == "cached"
+
+        temp_db._date_str_expires = 0.0
+        assert temp_db.get_ukraine_current_date_str() == date_str
@@ -1,6 +1,7 @@
 """Tests for ICS generation."""
 
 import pytest
+import re
 import tempfile
 import logging
 from datetime import datetime
@@ -81,6 +82,25 @@ class TestICSEventGenerator:
         assert "DTEND:" in content
         assert "Група 1.1" in content
 
+    def test_create_ics_content_line_layout(self, ics_generator, sample_event_dict):
+        """Test ICS content uses CRLF lines in the expected order."""
+        lines = ics_generator.create_ics_content(sample_event_dict).split("\r\n")
+
+        assert lines[:6] == [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//Power Monitor//Power Outage Monitor//EN",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            "BEGIN:VEVENT",
+        ]
+        assert lines[-4:] == [
+            "STATUS:CONFIRMED",
+            "TRANSP:OPAQUE",
+            "END:VEVENT",
+            "END:VCALENDAR",
+        ]
+
     def test_create_ics_content_all_day_event(self, ics_generator):
         """Test creating ICS content for all-day event."""
         all_day_event = {
@@ -96,11 +116,33 @@ class TestICSEventGenerator:
 
         content = ics_generator.create_ics_content(all_day_event)
 
-        assert "DTSTART;VALUE=DATE:" in content
-        assert "DTEND;VALUE=DATE:" in content
+        assert "DTSTART;VALUE=DATE:20240115\r\n" in content
+        assert "DTEND;VALUE=DATE:20240116\r\n" in content
         assert "BEGIN:VCALENDAR" in content
         assert "END:VCALENDAR" in content
 
+    def test_all_day_event_month_end(self, ics_generator, sample_event_dict):
+        """Test all-day events ending on the next month roll over correctly."""
+        event = dict(
+            sample_event_dict, date="31.12.2024", period_from=None, period_to=None
+        )
+
+        content = ics_generator.create_ics_content(event)
+
+        assert "DTSTART;VALUE=DATE:20241231\r\n" in content
+        assert "DTEND;VALUE=DATE:20250101\r\n" in content
+
+    def test_missing_uid_is_stable(self, ics_generator, sample_event_dict):
+        """Test events without a UID get the same derived UID every time."""
+        event = dict(sample_event_dict)
+        del event["calendar_event_uid"]
+
+        first = ics_generator.format_event(event, "20240115T000000Z")
+        second = ics_generator.format_event(event, "20240115T000000Z")
+
+        assert first == second
+        assert "@power-monitor\r\n" in first
+
     def test_create_single_ics_file(
         self, ics_generator, sample_event_dict, temp_output_dir
     ):
@@ -117,6 +159,16 @@ class TestICSEventGenerator:
         assert "Група 1.1" in content
         assert "test-uid-123@power-monitor" in content
 
+    def test_create_single_ics_file_sanitizes_filename(
+        self, ics_generator, sample_event_dict
+    ):
+        """Test characters invalid in filenames are replaced with underscores."""
+        event = dict(sample_event_dict, calendar_event_id='a<b>c:d"e/f\\g|h?i*j')
+
+        filepath = ics_generator.create_single_ics_file(event, timestamp="ts")
+
+        assert filepath.name == "ts_a_b_c_d_e_f_g_h_i_j.ics"
+
     def test_create_combined_ics_file(
         self, ics_generator, sample_event_dict, temp_output_dir
     ):
@@ -139,6 +191,15 @@ class TestICSEventGenerator:
         assert content.count("BEGIN:VEVENT") == 1
         assert content.count("END:VEVENT") == 1
 
+    def test_combined_ics_file_keeps_crlf(self, ics_generator, sample_event_dict):
+        """Test combined ICS file is written with bare CRLF line endings."""
+        filepath = ics_generator.create_combined_ics_file([sample_event_dict])
+
+        raw = filepath.read_bytes()
+        assert raw.startswith(b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\n")
+        assert raw.endswith(b"END:VEVENT\r\nEND:VCALENDAR")
+        assert b"\r\r\n" not in raw
+
     def test_create_combined_ics_file_multiple_events(
         self, ics_generator, temp_output_dir
     ):
@@ -177,6 +238,14 @@ class TestICSEventGenerator:
         assert "Група 1.1" in content
         assert "Група 2.1" in content
 
+        # All events in one file share a single DTSTAMP/CREATED value
+        stamps = {
+            line.split(":", 1)[1]
+            for line in content.splitlines()
+            if line.startswith(("DTSTAMP:", "CREATED:"))
+        }
+        assert len(stamps) == 1
+
     def test_create_cancellation_ics_file(self, ics_generator, temp_output_dir):
         """Test creating cancellation ICS file."""
         events_to_cancel = [
@@ -201,6 +270,21 @@ class TestICSEventGenerator:
         assert "STATUS:CANCELLED" in content
         assert content.count("BEGIN:VEVENT") == 2
 
+    def test_cancellation_uid_falls_back_to_event_id(self, ics_generator):
+        """Test cancelled events without a UID use the event id as UID."""
+        events_to_cancel = [
+            {"calendar_event_id": "event-1"},
+            {"calendar_event_id": "event-2", "calendar_event_uid": None},
+        ]
+
+        filepath = ics_generator.create_cancellation_ics_file(events_to_cancel)
+
+        content = filepath.read_bytes().decode("utf-8")
+        assert "UID:event-1@power-monitor\r\n" in content
+        assert "UID:event-2@power-monitor\r\n" in content
+        assert content.count("DTSTAMP:") == 2
+        assert len(set(re.findall(r"DTSTAMP:\S+", content))) == 1
+
     def test_create_cancellation_ics_file_empty_list(self, ics_generator):
         """Test creating cancellation ICS file with empty list."""
         filepath = ics_generator.create_cancellation_ics_file([])
@@ -241,6 +325,44 @@ class TestICSEventGenerator:
         combined_files = [f for f in ics_files if "all_power_events" in f.name]
         assert len(combined_files) == 1
 
+    def test_generate_ics_files_share_batch_timestamp(
+        self, ics_generator, sample_event_dict, temp_output_dir
+    ):
+        """Test every file in a batch shares one filename prefix and DTSTAMP."""
+        events = [
+            dict(sample_event_dict, calendar_event_id=f"event-{i}") for i in range(3)
+        ]
+
+        ics_generator.generate_ics_files(events)
+
+        ics_files = list(temp_output_dir.glob("*.ics"))
+        assert len(ics_files) == 4
+        assert len({f.name[:15] for f in ics_files}) == 1
+        dtstamps = {
+            line
+            for f in ics_files
+            for line in f.read_text(encoding="utf-8").splitlines()
+            if line.startswith("DTSTAMP:")
+        }
+        assert len(dtstamps) == 1
+
+    def test_generate_ics_files_many_events_combined_only(
+        self, ics_generator, sample_event_dict, temp_output_dir
+    ):
+        """Test large batches skip individual files and keep the combined one."""
+        events = [
+            dict(sample_event_dict, calendar_event_id=f"event-{i}")
+            for i in range(51)
+        ]
+
+        ics_generator.generate_ics_files(events)
+
+        ics_files = list(temp_output_dir.glob("*.ics"))
+        assert len(ics_files) == 1
+        assert "all_power_events" in ics_files[0].name
+        content = ics_files[0].read_text(encoding="utf-8")
+        assert content.count("BEGIN:VEVENT") == 51
+
     def test_generate_ics_files_empty_list(self, ics_generator, temp_output_dir):
         """Test generating ICS files with empty event list."""
         ics_generator.generate_ics_files([])
@@ -260,6 +382,17 @@ class TestICSEventGenerator:
         assert dt.minute == 30
         assert dt.tzinfo is not None
 
+    def test_parse_ukraine_datetime_reuses_parsed_values(self, ics_generator):
+        """Test repeated date/time pairs are parsed once and bad ones fall back."""
+        first = ics_generator.parse_ukraine_datetime("15.07.2024", "09:00")
+        second = ics_generator.parse_ukraine_datetime("15.07.2024", "09:00")
+
+        assert first is second
+        assert first.utcoffset().total_seconds() == 3 * 3600
+
+        fallback = ics_generator.parse_ukraine_datetime("bad", "09:00")
+        assert fallback.tzinfo is not None
+
     def test_parse_date_to_datetime(self, ics_generator):
         """Test parsing date to datetime."""
         dt = ics_generator.parse_date_to_datetime("15.01.2024")
@@ -268,6 +401,15 @@ class TestICSEventGenerator:
         assert dt.month == 1
         assert dt.day == 15
 
+    def test_parse_rejects_out_of_range_values(self, ics_generator):
+        """Test malformed or out-of-range dates and times use the fallbacks."""
+        before = datetime.now()
+
+        assert ics_generator.parse_date_to_datetime("32.01.2024") >= before
+        assert ics_generator.parse_date_to_datetime("15-01-2024") >= before
+        fallback = ics_generator.parse_ukraine_datetime("15.01.2024", "24:00")
+        assert fallback >= before.astimezone()
+
     def test_escape_text(self, ics_generator):
         """Test text escaping for ICS format."""
         text = "Test, text; with\nspecial chars"
@@ -277,6 +419,11 @@ class TestICSEventGenerator:
         assert "\\;" in escaped
         assert "\\n" in escaped
 
+    def test_escape_text_plain_and_backslash(self, ics_generator):
+        """Test plain text passes through and backslashes are escaped."""
+        assert ics_generator.escape_text("Група 1.1") == "Група 1.1"
+        assert ics_generator.escape_text("a\\b, c") == "a\\\\b\\, c"
+
     def test_format_datetime_for_ics(self, ics_generator):
         """Test datetime formatting for ICS."""
         dt = datetime(2024, 1, 15, 9, 30, 0)
@@ -286,6 +433,12 @@ class TestICSEventGenerator:
         assert "20240115" in formatted
         assert "093000" in formatted
 
+    def test_format_datetime_for_ics_converts_to_utc(self, ics_generator):
+        """Test aware datetimes are converted to UTC before formatting."""
+        dt = ics_generator.parse_ukraine_datetime("15.07.2024", "02:05")
+
+        assert ics_generator.format_datetime_for_ics(dt) == "20240714T230500Z"
+
     def test_overnight_period_handling(self, ics_generator):
         """Test handling of overnight periods."""
         overnight_event = {
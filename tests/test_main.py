@@ -61,9 +61,53 @@ def test_main_success(monkeypatch, main_module):
 
     # Check that logger.info was called with expected messages
     assert logger.info.call_count > 0
+    messages = [c.args[0] for c in logger.info.call_args_list if c.args]
+    assert any("up to 50 events" in m for m in messages)
     monitor.cleanup_old_data.assert_called_once()
 
 
+def test_main_logs_each_period_once(monkeypatch, main_module):
+    mock_parse_args, mock_setup_logging, mock_monitor_class = main_module
+
+    config = MagicMock()
+    config.continuous_mode = False
+    mock_parse_args.return_value = config
+
+    logger = MagicMock()
+    mock_setup_logging.return_value = logger
+
+    monitor = MagicMock()
+    monitor.run_full_process.return_value = (True, "success")
+    monitor.get_database_stats.return_value = {
+        "total_records": 3,
+        "unique_dates": 1,
+        "unique_groups": 2,
+        "last_24h_records": 3,
+    }
+    monitor.database.get_ukraine_current_date_str.return_value = "01.01.2024"
+    monitor.query_periods_by_date.return_value = [
+        ("Група 1.1", "Немає", "09:00", "12:00", "generated", "09:00", "e1"),
+        ("Група 1.1", "Немає", "09:00", "12:00", "generated", "08:00", "e2"),
+        ("Група 2.1", "Немає", None, None, "pending", "08:00", "e3"),
+    ]
+    mock_monitor_class.return_value = monitor
+
+    with patch("builtins.print"):
+        from power_outage_monitor.main import main
+
+        main()
+
+    period_lines = [
+        c.args[0]
+        for c in logger.info.call_args_list
+        if c.args and c.args[0].startswith("  Група")
+    ]
+    assert period_lines == [
+        "  Група 1.1: Немає (09:00-12:00) [generated]",
+        "  Група 2.1: Немає (all day) [pending]",
+    ]
+
+
 def test_main_continuous(monkeypatch, main_module):
     mock_parse_args, mock_setup_logging, mock_monitor_class = main_module
 
@@ -136,6 +136,14 @@ def test_stage3_enhanced_database_operations_file_not_found(monitor):
     assert result is None
 
 
+def test_stage3_enhanced_database_operations_uses_data_without_file(monitor):
+    data = {"date": "17.02.2026", "groups": []}
+    monitor.scraper.convert_to_outage_periods.side_effect = Exception("stop")
+    result = monitor.stage3_enhanced_database_operations(None, data)
+    assert result is None
+    monitor.scraper.convert_to_outage_periods.assert_called_once_with(data)
+
+
 def test_stage3_enhanced_database_operations_json_load_error(monitor, tmp_path):
     file = tmp_path / "bad.json"
     file.write_text("{bad json")
@@ -166,10 +174,10 @@ def test_stage3_enhanced_database_operations_insert_error(monitor, tmp_path):
     period = MagicMock()
     monitor.scraper.convert_to_outage_periods.return_value = [period]
     monitor.group_filter.filter_periods.return_value = [period]
-    monitor.database.insert_period.side_effect = Exception("fail")
-    # Should still proceed and log error
+    monitor.database.insert_periods.side_effect = Exception("fail")
+    # Batch insert failure aborts the stage
     result = monitor.stage3_enhanced_database_operations(file)
-    assert result is None or isinstance(result, Path)  # Could fail later
+    assert result is None
 
 
 def test_generate_enhanced_calendar_events_json_success(monitor, tmp_path):
@@ -275,15 +283,17 @@ def test_stage4_enhanced_calendar_generation_create_and_cancel(monitor, tmp_path
     monitor.ics_generator.create_cancellation_ics_file = MagicMock()
     monitor.ics_generator.generate_deletion_summary = MagicMock()
     monitor.ics_generator.generate_ics_files = MagicMock()
-    monitor.database.update_calendar_event_state = MagicMock()
-    monitor.database.mark_event_as_sent = MagicMock()
+    monitor.database.update_calendar_event_states = MagicMock()
+    monitor.database.mark_events_as_sent = MagicMock()
     monitor.logger.reset_mock()
     monitor.stage4_enhanced_calendar_generation(file)
     assert monitor.ics_generator.create_cancellation_ics_file.called
     assert monitor.ics_generator.generate_deletion_summary.called
     assert monitor.ics_generator.generate_ics_files.called
-    assert monitor.database.update_calendar_event_state.called
-    assert monitor.database.mark_event_as_sent.called
+    monitor.database.update_calendar_event_states.assert_called_once_with(
+        [(2, "discarded")]
+    )
+    monitor.database.mark_events_as_sent.assert_called_once_with([1])
 
 
 def test_cleanup_old_data(monitor):
@@ -322,3 +332,16 @@ def test_get_event_summary(monitor):
     assert "events_pending" in summary
     assert "events_by_state" in summary
     assert "last_24h_activity" in summary
+
+
+def test_run_continuous_monitoring_sleeps_until_deadline(monitor):
+    monitor.run_full_process = MagicMock(
+        side_effect=[(False, "error"), KeyboardInterrupt]
+    )
+    with patch("power_outage_monitor.monitor.time") as mock_time:
+        # Cycle starts at t=100, processing takes 40s, next cycle starts at t=400
+        mock_time.monotonic.side_effect = [100.0, 140.0, 400.0]
+        monitor.run_continuous_monitoring(interval_minutes=5)
+
+    mock_time.sleep.assert_called_once_with(260.0)
+    assert monitor.run_full_process.call_count == 2
@@ -1,8 +1,12 @@
+import gc
 import pytest
+import weakref
 from unittest.mock import MagicMock, patch
 import json
+import subprocess
+import sys
 
-from power_outage_monitor.scraper import PowerOutageScraper
+from power_outage_monitor.scraper import PowerOutageScraper, _close_open_scrapers
 
 
 @pytest.fixture
@@ -24,6 +28,22 @@ def test_init_sets_attributes(scraper):
     assert scraper.logger is not None
 
 
+def test_discarded_scraper_is_not_kept_alive(scraper, logger):
+    other = PowerOutageScraper(
+        base_url="http://test", timeout=5, headless=True, logger=logger
+    )
+    other_ref = weakref.ref(other)
+    del other
+    gc.collect()
+    assert other_ref() is None
+
+    driver = MagicMock()
+    scraper.driver = driver
+    _close_open_scrapers()
+    driver.quit.assert_called_once()
+    assert scraper.driver is None
+
+
 def test_get_ukraine_current_date_and_str(scraper):
     date_str = scraper.get_ukraine_current_date_str()
     assert isinstance(date_str, str)
@@ -36,6 +56,7 @@ def test_get_ukraine_current_date_and_str(scraper):
         ("14:30 17.02.2026", "17.02.2026 14:30"),
         ("2026-02-17T14:30:00", "17.02.2026 14:30"),
         ("bad format", "bad format"),
+        ("99:99 17.02.2026", "99:99 17.02.2026"),
     ],
 )
 def test_normalize_last_update(scraper, input_str, expected):
@@ -72,6 +93,21 @@ def test_parse_power_off_text_handles_24_00(scraper):
     assert result["groups"][0]["period"]["to"] == "23:59"
 
 
+def test_parse_power_off_text_keeps_first_date_and_update(scraper):
+    text = (
+        "Група 1.1. Електроенергія є.\n"
+        "Графік погодинних відключень на 17.02.2026\n"
+        "Інформація станом на 14:30 17.02.2026\n"
+        "Графік погодинних відключень на 18.02.2026\n"
+        "Інформація станом на 15:00 18.02.2026\n"
+        "Група 2.1. Електроенергії немає з 10:00 до 11:00.\n"
+    )
+    result = scraper.parse_power_off_text(text)
+    assert result["date"] == "17.02.2026"
+    assert result["last_update"] == "17.02.2026 14:30"
+    assert [g["name"] for g in result["groups"]] == ["Група 1.1", "Група 2.1"]
+
+
 def test_validate_schedule_data(scraper):
     # Valid, current date
     today = scraper.get_ukraine_current_date().strftime("%d.%m.%Y")
@@ -194,8 +230,132 @@ def test_convert_to_outage_periods_error(scraper):
             scraper.convert_to_outage_periods(data)
 
 
+def test_fetch_static_content(scraper):
+    html = (
+        "<html><body><div class='other'>ignored</div>"
+        "<div class='power-off__text'>"
+        "<p>Графік погодинних відключень на 17.02.2026</p>"
+        "<p>Інформація станом на 14:30 17.02.2026</p>"
+        "<p><b>Група 1.1.</b> Електроенергії немає з 09:00 до 12:00.</p>"
+        "</div></body></html>"
+    )
+    response = MagicMock()
+    response.read.return_value = html.encode("utf-8")
+    response.headers.get_content_charset.return_value = "utf-8"
+    with patch("urllib.request.urlopen") as mock_urlopen:
+        mock_urlopen.return_value.__enter__.return_value = response
+        result = scraper.fetch_static_content()
+    assert result["date"] == "17.02.2026"
+    assert result["groups"][0]["period"] == {"from": "09:00", "to": "12:00"}
+
+
+def _static_response(html):
+    response = MagicMock()
+    response.read.return_value = html.encode("utf-8")
+    response.headers.get_content_charset.return_value = "utf-8"
+    return response
+
+
+def test_fetch_static_content_pretty_printed_markup(scraper):
+    html = """
+    <div class="power-off__text">
+        <p>
+            Графік погодинних відключень на 17.02.2026
+        </p>
+        <p>Інформація станом на 14:30
+            17.02.2026</p>
+        <p><b>Група 1.1.</b> Електроенергії немає
+            з 09:00 до 12:00.</p>
+        <p><b>Група 2.1.</b>
+            Електроенергія є.</p>
+    </div>
+    """
+    with patch("urllib.request.urlopen") as mock_urlopen:
+        mock_urlopen.return_value.__enter__.return_value = _static_response(html)
+        result = scraper.fetch_static_content()
+    assert result["date"] == "17.02.2026"
+    assert result["last_update"] == "17.02.2026 14:30"
+    assert [group["name"] for group in result["groups"]] == ["Група 1.1", "Група 2.1"]
+    assert result["groups"][0]["period"] == {"from": "09:00", "to": "12:00"}
+
+
+def test_fetch_static_content_nbsp(scraper):
+    html = (
+        "<div class='power-off__text'>"
+        "<p>Графік погодинних відключень на&nbsp;17.02.2026</p>"
+        "<p>Інформація станом на 14:30&nbsp;17.02.2026</p>"
+        "<p>Група&nbsp;1.1. Електроенергії немає з&nbsp;09:00 до 12:00.</p>"
+        "</div>"
+    )
+    with patch("urllib.request.urlopen") as mock_urlopen:
+        mock_urlopen.return_value.__enter__.return_value = _static_response(html)
+        result = scraper.fetch_static_content()
+    assert result["last_update"] == "17.02.2026 14:30"
+    assert result["groups"][0]["name"] == "Група 1.1"
+
+
+def test_fetch_static_content_partial_schedule(scraper):
+    html = (
+        "<div class='power-off__text'>"
+        "<p>Графік погодинних відключень на 17.02.2026</p>"
+        "<p>Інформація станом на 14:30 17.02.2026</p>"
+        "<p>Група 1.1. Електроенергії немає з 09:00 до 12:00.</p>"
+        "<p>Група 2.1 невідомий формат рядка</p>"
+        "</div>"
+    )
+    with patch("urllib.request.urlopen") as mock_urlopen:
+        mock_urlopen.return_value.__enter__.return_value = _static_response(html)
+        assert scraper.fetch_static_content() is None
+
+
+def test_fetch_static_content_without_schedule(scraper):
+    response = MagicMock()
+    response.read.return_value = b"<html><div class='power-off__text'></div></html>"
+    response.headers.get_content_charset.return_value = None
+    with patch("urllib.request.urlopen") as mock_urlopen:
+        mock_urlopen.return_value.__enter__.return_value = response
+        assert scraper.fetch_static_content() is None
+    with patch("urllib.request.urlopen", side_effect=OSError("offline")):
+        assert scraper.fetch_static_content() is None
+
+
+def test_extract_dynamic_content_placeholder_uses_selenium(scraper):
+    html = (
+        "<html><div class='power-off__text'>"
+        "<p>Завантаження графіка відключень, будь ласка, зачекайте...</p>"
+        "</div></html>"
+    )
+    response = MagicMock()
+    response.read.return_value = html.encode("utf-8")
+    response.headers.get_content_charset.return_value = "utf-8"
+    driver = MagicMock()
+    scraper._setup_driver = MagicMock(return_value=driver)
+    element = MagicMock()
+    element.text = (
+        "Графік погодинних відключень на 17.02.2026\n"
+        "Група 1.1. Електроенергії немає з 09:00 до 12:00.\n"
+    )
+    driver.find_elements.return_value = [element]
+    driver.find_element.return_value.text = element.text
+    with patch("urllib.request.urlopen") as mock_urlopen:
+        mock_urlopen.return_value.__enter__.return_value = response
+        assert scraper.fetch_static_content() is None
+        result = scraper.extract_dynamic_content()
+    scraper._setup_driver.assert_called_once()
+    assert result["date"] == "17.02.2026"
+    assert result["groups"][0]["name"] == "Група 1.1"
+
+
+def test_extract_dynamic_content_prefers_static(scraper):
+    scraper.fetch_static_content = MagicMock(return_value={"date": "17.02.2026"})
+    scraper._setup_driver = MagicMock()
+    assert scraper.extract_dynamic_content() == {"date": "17.02.2026"}
+    scraper._setup_driver.assert_not_called()
+
+
 def test_extract_dynamic_content_success(scraper):
     # Patch _setup_driver and driver methods
+    scraper.fetch_static_content = MagicMock(return_value=None)
     driver = MagicMock()
     scraper._setup_driver = MagicMock(return_value=driver)
     element = MagicMock()
@@ -208,10 +368,44 @@ def test_extract_dynamic_content_success(scraper):
     driver.find_element.return_value.text = element.text
     result = scraper.extract_dynamic_content()
     assert result["date"] == "17.02.2026"
+    driver.quit.assert_not_called()
+
+    # The warm browser is reused by the next poll and quit on close
+    scraper.extract_dynamic_content()
+    scraper._setup_driver.assert_called_once()
+    scraper.close()
     driver.quit.assert_called_once()
+    assert scraper.driver is None
+
+
+@pytest.mark.parametrize("debug", [False, True])
+def test_extract_dynamic_content_body_fallback(scraper, tmp_path, monkeypatch, debug):
+    monkeypatch.chdir(tmp_path)
+    scraper.timeout = 0
+    scraper.logger.isEnabledFor.return_value = debug
+    scraper.fetch_static_content = MagicMock(return_value=None)
+    driver = MagicMock()
+    scraper._setup_driver = MagicMock(return_value=driver)
+    driver.find_elements.return_value = []
+    driver.find_element.return_value.text = (
+        "Графік погодинних відключень на 17.02.2026\n"
+        "Група 1.1. Електроенергія є.\n"
+    )
+    result = scraper.extract_dynamic_content()
+    assert result["date"] == "17.02.2026"
+    assert (tmp_path / "selenium_all_content.txt").exists() is debug
 
 
 def test_extract_dynamic_content_error(scraper):
+    scraper.fetch_static_content = MagicMock(return_value=None)
     scraper._setup_driver = MagicMock(side_effect=Exception("fail"))
     result = scraper.extract_dynamic_content()
     assert result is None
+
+
+def test_package_import_does_not_load_selenium():
+    code = (
+        "import sys, power_outage_monitor; "
+        "sys.exit('selenium' in sys.modules or 'pytz' in sys.modules)"
+    )
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
@@ -4,7 +4,12 @@ import pytest
 import logging
 from unittest.mock import MagicMock
 
+import power_outage_monitor.utils as utils_module
 from power_outage_monitor.utils import (
+    dump_json,
+    load_json,
+    load_timezone,
+    localize,
     normalize_time,
     time_to_minutes,
     minutes_to_time,
@@ -15,6 +20,7 @@ from power_outage_monitor.utils import (
     PeriodComparator,
 )
 from datetime import datetime, timedelta
+import pytz
 
 # --- Utility Function Tests ---
 
@@ -29,6 +35,7 @@ from datetime import datetime, timedelta
         ("09.30", "09:30"),
         ("09:30", "09:30"),
         ("invalid", "invalid"),
+        ("09:30:00", "09:30:00"),
         ("", ""),
     ],
 )
@@ -43,9 +50,11 @@ def test_normalize_time(input_str, expected):
         ("01:00", 60),
         ("12:30", 750),
         ("23:59", 1439),
+        ("9:05", 545),
         ("", 0),
         (None, 0),
         ("invalid", 0),
+        ("ab:cd", 0),
     ],
 )
 def test_time_to_minutes(input_str, expected):
@@ -118,6 +127,46 @@ def test_extract_group_code(group_name, expected):
     assert extract_group_code(group_name) == expected
 
 
+@pytest.mark.parametrize(
+    "tz", [load_timezone("Europe/Kiev"), pytz.timezone("Europe/Kiev")]
+)
+def test_localize_uses_dst_offset(tz):
+    summer = localize(datetime(2024, 7, 15, 9, 0), tz)
+    winter = localize(datetime(2024, 1, 15, 9, 0), tz)
+    assert summer.astimezone(pytz.UTC).hour == 6
+    assert winter.astimezone(pytz.UTC).hour == 7
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dump_and_load_json_roundtrip(tmp_path, monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(utils_module, "orjson", None)
+    data = {"date": "17.02.2026", "groups": [{"name": "Група 1.1"}]}
+    filepath = tmp_path / "data.json"
+
+    dump_json(data, filepath)
+
+    text = filepath.read_text(encoding="utf-8")
+    assert "Група 1.1" in text
+    assert text.startswith('{\n  "date"')
+    assert load_json(filepath) == data
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dump_json_int_keys(tmp_path, monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(utils_module, "orjson", None)
+    filepath = tmp_path / "data.json"
+
+    dump_json({1: "a"}, filepath)
+
+    assert load_json(filepath) == {"1": "a"}
+
+
 # --- GroupFilter Tests ---
 
 
@@ -293,6 +342,52 @@ def test_smart_period_comparator_overlap_discard():
     db.update_calendar_event_state.assert_called_with(4, "discarded")
 
 
+@pytest.mark.parametrize("batched", [True, False])
+def test_smart_period_comparator_with_database(tmp_path, batched):
+    from power_outage_monitor.db import OutagePeriod, PowerOutageDatabase
+
+    logger = logging.getLogger("test")
+    database = PowerOutageDatabase(tmp_path / "periods.db", logger)
+
+    def make(period_from, period_to, last_update):
+        return OutagePeriod(
+            date="15.01.2024",
+            name="Група 1.1",
+            status="Електроенергії немає",
+            period_from=period_from,
+            period_to=period_to,
+            last_update=last_update,
+        )
+
+    old = make("08:00", "12:00", "15.01.2024 07:00")
+    database.insert_period(old)
+    database.update_calendar_event_state(old.recid, "generated")
+
+    # The first new period replaces the old one; the second overlaps only the
+    # first new period, so it must see it as generated
+    first = make("10:00", "14:00", "15.01.2024 08:00")
+    second = make("13:00", "16:00", "15.01.2024 09:00")
+    database.insert_periods([first, second])
+
+    comparator = SmartPeriodComparator(logger)
+    if batched:
+        comparator.process_smart_period_comparisons(database, [first, second])
+    else:
+        for period in (first, second):
+            comparator._process_single_period(database, period)
+
+    states = {
+        p.recid: p.calendar_event_state
+        for p in database.get_periods_by_date("15.01.2024")
+    }
+    database.close()
+    assert states == {
+        old.recid: "cancelled",
+        first.recid: "cancelled",
+        second.recid: "generated",
+    }
+
+
 def test_smart_period_comparator_error_handling():
     logger = logging.getLogger("test")
     comparator = SmartPeriodComparator(logger)
@@ -317,9 +412,9 @@ def test_period_comparator_power_available():
     period.insert_ts = datetime.now()
 
     db.get_ukraine_current_date_str.return_value = "15.01.2024"
-    db.get_periods_by_name_and_date.return_value = [period]
+    db.get_periods_by_date.return_value = [period]
     comparator.process_advanced_period_comparisons(db, [period])
-    db.update_calendar_event_state.assert_called_with(1, "generated")
+    db.update_calendar_event_states.assert_called_once_with([(1, "generated")])
 
 
 def test_period_comparator_power_outage_intersection():
@@ -345,10 +440,43 @@ def test_period_comparator_power_outage_intersection():
     period2.period_from = "11:00"
     period2.period_to = "14:00"
     db.get_ukraine_current_date_str.return_value = "15.01.2024"
-    db.get_periods_by_name_and_date.return_value = [period1, period2]
+    db.get_periods_by_date.return_value = [period1, period2]
     comparator.process_advanced_period_comparisons(db, [period1, period2])
-    db.update_calendar_event_state.assert_any_call(1, "generated")
-    db.update_calendar_event_state.assert_any_call(2, "discarded")
+    db.update_calendar_event_states.assert_called_once_with(
+        [(1, "generated"), (2, "discarded")]
+    )
+
+
+def test_period_comparator_discards_non_intersecting_older_periods():
+    logger = logging.getLogger("test")
+    comparator = PeriodComparator(logger)
+    db = MagicMock()
+
+    def make(recid, period_from, period_to, state):
+        period = MagicMock()
+        period.name = "Група 1.1"
+        period.status = "Електроенергії немає"
+        period.calendar_event_state = state
+        period.recid = recid
+        period.period_from = period_from
+        period.period_to = period_to
+        return period
+
+    latest = make(1, "09:00", "12:00", "pending")
+    overlapping = make(2, "11:00", "14:00", "generated")
+    separate = make(3, "18:00", "20:00", "generated")
+    already_discarded = make(4, "20:00", "22:00", "discarded")
+    db.get_ukraine_current_date_str.return_value = "15.01.2024"
+    db.get_periods_by_date.return_value = [
+        latest,
+        overlapping,
+        separate,
+        already_discarded,
+    ]
+    comparator.process_advanced_period_comparisons(db, [latest])
+    db.update_calendar_event_states.assert_called_once_with(
+        [(1, "generated"), (2, "discarded"), (3, "discarded")]
+    )
 
 
 def test_period_comparator_no_existing_periods():
@@ -359,7 +487,7 @@ def test_period_comparator_no_existing_periods():
     period.name = "Група 1.1"
     period.status = "Електроенергія є"
     db.get_ukraine_current_date_str.return_value = "15.01.2024"
-    db.get_periods_by_name_and_date.return_value = []
+    db.get_periods_by_date.return_value = []
     comparator.process_advanced_period_comparisons(db, [period])
 
 